@@ -96,7 +96,7 @@ class DiscoveryProtocol(asyncio.protocols.DatagramProtocol):
             addr[1],
             data=data)
         if self.server_re.search(data):
-            self.player_queue.put_nowait(models.Player(addr[0]))
+            self.player_queue.put_nowait(models.Player.get_instance(addr[0]))
 
     def connection_lost(self, exc: Optional[Exception]) -> None:
         if exc is not None:
@@ -16,6 +16,7 @@ log = logging.getLogger(__name__)
 
 # type aliases
 EventCB = Callable[['Event'], None]
+BatchEventCB = Callable[[List['Event']], None]
 
 
 class Event:
@@ -23,18 +24,37 @@ class Event:
     service_type: str
     player: models.Player
     seq: int
-    properties: Dict[str, Any]
 
     def __init__(
             self,
             subscription: 'Subscription',
             seq: int,
-            properties: Dict[str, Any]):
+            body: bytes):
         self.subscription = subscription
         self.service_type = subscription.service.service_type
         self.player = subscription.player
         self.seq = seq
-        self.properties = properties
+
+        # the raw XML body of the NOTIFY request: only parsed if someone
+        # actually looks at the event properties
+        self._body = body
+        self._properties: Optional[Dict[str, Any]] = None
+
+        # ...except for topology events: parsing ZoneGroupState updates the
+        # shared Player objects, so it has to happen in the order the
+        # events arrive, not whenever someone gets round to looking
+        if isinstance(subscription.service, upnp.ZoneGroupTopology):
+            self._properties = parsers.parse_event_body(body)
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        '''The evented variables of this event (see parsers.parse_event_body()).
+
+        Parsed from the event body on first access, then cached.
+        '''
+        if self._properties is None:
+            self._properties = parsers.parse_event_body(self._body)
+        return self._properties
 
     def __str__(self):
         return '{} {} #{}'.format(self.service_type, self.subscription.sid, self.seq)
@@ -66,11 +86,25 @@ class Subscription:
             session: aiohttp.client.ClientSession,
             player: models.Player,
             service: upnp.UPnPService,
-            callback: EventCB):
+            callback: Optional[EventCB] = None,
+            batch_callback: Optional[BatchEventCB] = None,
+            batch_delay: float = 0.0):
+        assert (callback is None) != (batch_callback is None), \
+            'need exactly one of callback and batch_callback'
         self.session = session
         self.player = player
         self.service = service
         self.callback = callback
+        self.batch_callback = batch_callback
+        self.batch_delay = batch_delay
+
+        # events received but not yet passed to callback: Sonos players
+        # tend to send several NOTIFY requests in a burst, so we queue
+        # them up and dispatch everything that arrived in the same
+        # iteration of the event loop (or within batch_delay seconds of
+        # the first one) with one call
+        self._pending: List[Event] = []
+        self._dispatch_scheduled = False
 
         self.state = 0             # 0 = brand new, 1 = subscribed, 2 = unsubscribed
 
@@ -104,27 +138,31 @@ class Subscription:
         # NT: upnp:event
         # TIMEOUT: Second-requested subscription duration (optional)
 
-        callback_url = event_server.get_url()
-        req_headers = {
-            "Callback": "<{}>".format(callback_url),
-            "NT": "upnp:event",
-        }
-
         self.subscribe_url = (self.player.base_url +
                               self.service.event_subscription_url)
-        response = await self.session.request(
-            "SUBSCRIBE",
-            self.subscribe_url,
-            headers=req_headers,
-            timeout=3.0,
-        )
+        await self._subscribe(event_server)
+
+        # Set up auto_renew
+        if auto_renew and self.timeout > 0:
+            # cancelled by unsubscribe()
+            self.auto_renew_task = event_server.loop.create_task(
+                self._auto_renew_loop())
+
+    async def _subscribe(self, event_server: 'EventServer') -> None:
+        '''Send a SUBSCRIBE request for a new SID, and switch to it.'''
+        req_headers = event_server.get_subscribe_headers()
+        response = await self._request("SUBSCRIBE", self.subscribe_url, req_headers)
         await check_response(response)
 
         headers = response.headers
+        old_sid = self.sid
         self.sid = headers["sid"]
         assert self.sid is not None
 
-        # Register the subscription so it can be cleaned up
+        # Register the subscription so it can be cleaned up (and forget
+        # the old SID, if this is a resubscribe)
+        if old_sid:
+            self._instances.pop(old_sid, None)
         self._instances[self.sid] = self
 
         self.timeout = self._parse_timeout(headers)
@@ -138,25 +176,52 @@ class Subscription:
             self.state,
         )
 
-        # Set up auto_renew
-        if auto_renew and self.timeout > 0:
+        if self.timeout > 0:
             if self.timeout <= 3600:
                 self.auto_renew_delay = int(self.timeout * 0.95)
             else:
                 self.auto_renew_delay = self.timeout - 180
-            loop = utils.get_event_loop()
-            # hmmmm, need to cancel this on shutdown
-            self.auto_renew_task = loop.create_task(self._auto_renew_loop())
 
     async def _auto_renew_loop(self):
         assert self.auto_renew_delay is not None
-        while True:
-            await asyncio.sleep(self.auto_renew_delay)
+        delay = self.auto_renew_delay
+        failures = 0
+        while self.state == 1:
+            await asyncio.sleep(delay)
+            if self.state != 1:
+                break
             try:
-                await self.renew()
+                await self._renew_or_resubscribe()
             except Exception:
-                log.exception('Subscription %s: failed to auto-renew (url=%s, state=%d)',
-                              self, self.subscribe_url, self.state)
+                # Players do sometimes fail transiently (eg. 500 errors
+                # when busy), so retry soon -- backing off a bit each time
+                # -- rather than waiting so long the subscription expires.
+                failures += 1
+                delay = min(30, 2 ** failures)
+                log.exception('Subscription %s: failed to auto-renew (url=%s, state=%d); '
+                              'retrying in %d sec',
+                              self, self.subscribe_url, self.state, delay)
+            else:
+                failures = 0
+                delay = self.auto_renew_delay
+
+    async def _renew_or_resubscribe(self) -> None:
+        # Once the subscription has expired, or the player has forgotten
+        # it (eg. because it rebooted), renewing is never going to work:
+        # start again with a new SID.
+        if time.time() - self.timestamp >= self.timeout:
+            log.warning('Subscription %s: expired; resubscribing (url=%s)',
+                        self, self.subscribe_url)
+        else:
+            try:
+                await self.renew()
+                return
+            except aiohttp.ClientResponseError as err:
+                if err.status != 412:
+                    raise
+                log.warning('Subscription %s: unknown to player; resubscribing (url=%s)',
+                            self, self.subscribe_url)
+        await self._subscribe(get_event_server())
 
     async def renew(self) -> None:
         if self.state != 1:
@@ -169,12 +234,7 @@ class Subscription:
             "SID": self.sid,
         }
 
-        response = await self.session.request(
-            "SUBSCRIBE",
-            self.subscribe_url,
-            headers=req_headers,
-            timeout=3.0,
-        )
+        response = await self._request("SUBSCRIBE", self.subscribe_url, req_headers)
         await check_response(response)
 
         self.timeout = self._parse_timeout(response.headers)
@@ -192,26 +252,37 @@ class Subscription:
         req_headers = {
             "SID": self.sid,
         }
-        response = await self.session.request(
+        response = await self._request(
             "UNSUBSCRIBE",
             self.player.base_url + self.service.event_subscription_url,
-            headers=req_headers,
+            req_headers,
             timeout=1.0,
         )
-        await check_response(response)
+        # 412 Precondition Failed means the player does not know this SID,
+        # most likely because the subscription already expired: as far as
+        # we're concerned, that's as good as a successful unsubscribe
+        if response.status != 412:
+            await check_response(response)
         log.info('Subscription %s: unsubscribe response: %r %s',
                  self, response.status, response.reason)
-        if response.status == 200:
+        if response.status in (200, 412):
             self.state = 2
-            del self._instances[self.sid]
+            self._instances.pop(self.sid, None)
+            # only now: if unsubscribing failed, we're still subscribed,
+            # so auto-renew must keep going
+            if self.auto_renew_task is not None:
+                self.auto_renew_task.cancel()
+                self.auto_renew_task = None
 
     async def _request(
             self,
             method: str,
             url: str,
-            headers: Dict[str, str]) -> aiohttp.ClientResponse:
+            headers: Dict[str, str],
+            timeout: float = 3.0) -> aiohttp.ClientResponse:
         return await self.session.request(
-            method, url, headers=headers, timeout=3.0)
+            method, url, headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout))
 
     def _parse_timeout(self, headers: 'multidict.CIMultiDictProxy[str]') -> int:
         timeout = headers["timeout"]
@@ -222,9 +293,39 @@ class Subscription:
             return -1
         return int(timeout.lstrip("Second-"))
 
-    def handle_event(self, event: Event):
-        log.info('Subscription %s: received event %r', self.sid, event)
-        self.callback(event)
+    def handle_event(self, event: Event) -> None:
+        # one of these for every NOTIFY, so keep it out of the INFO log
+        log.debug('Subscription %s: received event %r', self.sid, event)
+        self._pending.append(event)
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            loop = asyncio.get_running_loop()
+            if self.batch_delay > 0:
+                loop.call_later(self.batch_delay, self._dispatch_events)
+            else:
+                loop.call_soon(self._dispatch_events)
+
+    def _dispatch_events(self) -> None:
+        events = self._pending
+        self._pending = []
+        self._dispatch_scheduled = False
+        batch_callback = self.batch_callback
+        if batch_callback is not None:
+            try:
+                batch_callback(events)
+            except Exception:
+                log.exception('Subscription %s: error in callback for events %r',
+                              self.sid, events)
+            return
+
+        callback = self.callback
+        assert callback is not None
+        for event in events:
+            try:
+                callback(event)
+            except Exception:
+                log.exception('Subscription %s: error in callback for event %r',
+                              self.sid, event)
 
 
 async def check_response(response):
@@ -234,7 +335,7 @@ async def check_response(response):
             body = f' (response body: {body[0:500]})'
         else:
             body = ' (no response body)'
-        log.warn(
+        log.warning(
             'Received %d %s error response from %s%s',
             response.status,
             response.reason,
@@ -248,6 +349,7 @@ class EventServer:
     server: Optional[web.Server]
     runner: web.ServerRunner
     url: str
+    subscribe_headers: Dict[str, str]
 
     def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
         self.loop = loop
@@ -273,9 +375,21 @@ class EventServer:
         self.url = 'http://{}:{}/'.format(addr, port)
         log.info('EventServer: ready for HTTP requests: url = %s', self.url)
 
+        # Every SUBSCRIBE request sends the same headers, so build them
+        # once. (aiohttp copies request headers, so sharing them is safe.)
+        self.subscribe_headers = {
+            "Callback": "<{}>".format(self.url),
+            "NT": "upnp:event",
+        }
+
     def get_url(self) -> str:
         return self.url
 
+    def get_subscribe_headers(self) -> Dict[str, str]:
+        '''Return the headers for a SUBSCRIBE request that will deliver
+        events to this server.'''
+        return self.subscribe_headers
+
     async def handle(self, request: web.BaseRequest) -> web.StreamResponse:
         '''Receive an HTTP NOTIFY request and emit an Event object.
 
@@ -316,8 +430,10 @@ class EventServer:
                 request.headers['content-type'] == 'text/xml'):
             (subscription, event) = self.parse_event(request.headers, body)
             if subscription is not None and event is not None:
-                # return response to the Sonos before handling the event
-                self.loop.call_soon(subscription.handle_event, event)
+                # the subscription will run the callback on a later
+                # iteration of the loop, so the response goes back to the
+                # Sonos before the event is handled
+                subscription.handle_event(event)
 
         return web.Response(text='')
 
@@ -325,7 +441,6 @@ class EventServer:
             self,
             headers: 'multidict.CIMultiDictProxy[str]',
             body: bytes) -> Tuple[Optional[Subscription], Optional[Event]]:
-        # import pprint
         sid = headers['sid']       # event subscription id
         seq = int(headers['seq'])  # event sequence number
         subscription = Subscription.get_instance(sid)
@@ -333,10 +448,7 @@ class EventServer:
             log.warning('received event for unknown subscription: %s', sid)
             return (None, None)
 
-        properties = parsers.parse_event_body(body)
-        # log.debug('parse_event_body returned properties:\n%s',
-        #           pprint.pformat(properties, indent=2, width=120))
-        return (subscription, Event(subscription, seq, properties))
+        return (subscription, Event(subscription, seq, body))
 
 
 async def _get_local_addr(
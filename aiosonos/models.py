@@ -1,20 +1,32 @@
 import logging
-from typing import Optional, ClassVar, Dict, List
-from urllib import parse as urlparse
+import weakref
+from typing import (
+    Any, Callable, Optional, ClassVar, Dict, Iterable, Iterator, List, Mapping, Tuple)
 
 log = logging.getLogger(__name__)
 
 
 def stdrepr(self):
-    return '<{} at {:x}: {}>'.format(self.__class__.__name__, id(self), self)
+    return f'<{self.__class__.__name__} at {id(self):x}: {self}>'
 
 
 class Player:
-    _instances: ClassVar[Dict[str, 'Player']] = {}
+    '''A single Sonos player, identified by its IP address.
+
+    Use get_instance() rather than constructing Players directly: that
+    way, there is only one Player object per IP address, and comparing
+    Players is just an identity check.
+    '''
+    __slots__ = (
+        'ip_address', 'base_url', '_uuid', 'name', 'is_coordinator', 'is_bridge',
+        '_hash', '_str', '__weakref__')
+
+    # weak values, so Players that nobody refers to any more can go away
+    _instances: ClassVar['weakref.WeakValueDictionary[str, Player]'] = \
+        weakref.WeakValueDictionary()
 
     ip_address: str
     base_url: str
-    uuid: Optional[str]
     name: Optional[str]
     is_coordinator: Optional[bool]
     is_bridge: Optional[bool]
@@ -28,13 +40,33 @@ class Player:
 
     def __init__(self, ip_address: str):
         self.ip_address = ip_address
-        self.base_url = 'http://{}:1400/'.format(self.ip_address)
-        self.uuid = None
+        self.base_url = f'http://{ip_address}:1400/'
+        self._uuid: Optional[str] = None
         self.name = None
         self.is_coordinator = None
         self.is_bridge = None
 
+        # Players live in sets and dicts, and ip_address never changes, so
+        # compute the hash just once
+        self._hash = hash(ip_address)
+
+        # likewise, str(player) is needed all the time (mostly for logging)
+        # but only changes when uuid does
+        self._str: Optional[str] = None
+
+    @property
+    def uuid(self) -> Optional[str]:
+        return self._uuid
+
+    @uuid.setter
+    def uuid(self, uuid: Optional[str]) -> None:
+        if uuid != self._uuid:
+            self._uuid = uuid
+            self._str = None
+
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         return (isinstance(other, self.__class__) and
                 self.ip_address == other.ip_address)
 
@@ -42,13 +74,15 @@ class Player:
         return not self.__eq__(other)
 
     def __hash__(self) -> int:
-        return hash(self.ip_address)
+        return self._hash
 
     def __str__(self) -> str:
-        if self.uuid is None:
-            return self.ip_address
-        else:
-            return '{}/{}'.format(self.ip_address, self.uuid)
+        if self._str is None:
+            if self._uuid is None:
+                self._str = self.ip_address
+            else:
+                self._str = f'{self.ip_address}/{self._uuid}'
+        return self._str
 
     __repr__ = stdrepr
 
@@ -60,28 +94,49 @@ class Player:
         )
 
     def get_url(self, path: str) -> str:
-        return urlparse.urljoin(self.base_url, path)
+        '''Return an absolute URL for path on this player.
+
+        path is usually relative (eg. "/xml/device_description.xml"), but
+        may already be absolute (eg. album art from an internet radio
+        station), in which case it is returned as-is. A scheme-relative
+        path ("//host/path") gets the player's scheme, as with urljoin().
+        '''
+        # base_url is always "http://<ip>:1400/", so we don't need the full
+        # generality (or expense) of urljoin(). Only look at the start of
+        # path: the query string of a relative path can contain an
+        # unencoded URL (eg. "/getaa?s=1&u=x-rincon-mp3radio://...").
+        if not path:
+            return self.base_url
+        if path.startswith(('http://', 'https://')):
+            return path
+        if path.startswith('//'):
+            return 'http:' + path
+        return self.base_url + path.lstrip('/')
 
 
 class PlayerDescription:
+    __slots__ = ('udn', 'room_name', 'display_name')
+
     udn: str
     room_name: str
     display_name: str
 
 
 class Group:
+    __slots__ = ('uuid', 'coordinator', 'members')
+
     uuid: str
     coordinator: Player
-    members: List[Player]
+    members: Tuple[Player, ...]
 
     def __init__(
             self,
             uuid: str,
             coordinator: Player,
-            members: List[Player]):
+            members: Iterable[Player]):
         self.uuid = uuid
         self.coordinator = coordinator
-        self.members = members
+        self.members = tuple(members)
 
     def __str__(self) -> str:
         return self.uuid
@@ -90,18 +145,32 @@ class Group:
 
 
 class Network:                  # or is this a household?
-    groups: List[Group]
-    visible_players: List[Player]
-    all_players: List[Player]
+    __slots__ = (
+        'groups', 'visible_players', 'all_players', '_by_coordinator',
+        '_lookup', '_names')
+
+    # a Network is a snapshot of the topology at one moment, so none of
+    # these change after construction
+    groups: Tuple[Group, ...]
+    visible_players: Tuple[Player, ...]
+    all_players: Tuple[Player, ...]
+    _by_coordinator: Dict[Player, Group]
+
+    # built by find_coordinator() the first time it's needed
+    _lookup: Optional[Dict[Optional[str], Player]]
+    _names: Optional[List[Tuple[str, Player]]]
 
     def __init__(
             self,
-            groups: List[Group],
-            visible_players: List[Player],
-            all_players: List[Player]):
-        self.groups = groups
-        self.visible_players = visible_players
-        self.all_players = all_players
+            groups: Iterable[Group],
+            visible_players: Iterable[Player],
+            all_players: Iterable[Player]):
+        self.groups = tuple(groups)
+        self.visible_players = tuple(visible_players)
+        self.all_players = tuple(all_players)
+        self._by_coordinator = {group.coordinator: group for group in self.groups}
+        self._lookup = None
+        self._names = None
 
     def __str__(self) -> str:
         return '{} groups, {} players'.format(len(self.groups), len(self.all_players))
@@ -114,14 +183,45 @@ class Network:                  # or is this a household?
 
     def get_group(self, coordinator: Player) -> Optional[Group]:
         '''return the group with the specified coordinator (or None)'''
-        for group in self.groups:
-            if group.coordinator == coordinator:
-                return group
+        return self._by_coordinator.get(coordinator)
+
+    def find_coordinator(self, target: str) -> Optional[Player]:
+        '''return the coordinator of the group identified by target (or None)
+
+        target can be the group ID, or the coordinator's ID or IP address,
+        or part of the coordinator's name (case-insensitive). An exact match
+        on an ID or address wins over a partial match on a name.
+        '''
+        if self._lookup is None or self._names is None:
+            lookup: Dict[Optional[str], Player] = {}
+            for group in self.groups:
+                coordinator = group.coordinator
+                lookup.setdefault(group.uuid, coordinator)
+                lookup.setdefault(coordinator.uuid, coordinator)
+                lookup.setdefault(coordinator.ip_address, coordinator)
+            self._lookup = lookup
+            self._names = [
+                (group.coordinator.name.lower(), group.coordinator)
+                for group in self.groups
+                if group.coordinator.name is not None
+            ]
+
+        match = self._lookup.get(target)
+        if match is not None:
+            return match
+        target = target.lower()
+        for (name, coordinator) in self._names:
+            if target in name:
+                return coordinator
         return None
 
 
 class Track:
     '''A single music track, either currently playing or in the queue.'''
+    __slots__ = (
+        'artist', 'album', 'title', 'duration', 'track_uri', 'album_art_uri',
+        'album_pos', 'queue_pos')
+
     artist: str
     album: str
     title: str
@@ -163,6 +263,8 @@ class Track:
 
 class TrackList:
     '''A list of music tracks. Used for queues and search results.'''
+    __slots__ = ('tracks', 'number_returned', 'total_matches', 'update_id')
+
     tracks: List[Track]
     number_returned: int
     total_matches: int
@@ -189,3 +291,87 @@ class TrackList:
 
     def __len__(self):
         return len(self.tracks)
+
+    def __getitem__(self, index):
+        return self.tracks[index]
+
+
+class TransportInfo:
+    '''The playback state of a player (see sonos.get_transport_info()).'''
+    __slots__ = ('state', 'status', 'speed')
+
+    state: str           # PLAYING, TRANSITIONING, PAUSED_PLAYBACK, or STOPPED
+    status: str          # OK, ?
+    speed: str           # 1, ?
+
+    def __init__(self, state: str, status: str, speed: str):
+        self.state = state
+        self.status = status
+        self.speed = speed
+
+    def __str__(self) -> str:
+        return self.state
+
+    __repr__ = stdrepr
+
+    def asdict(self) -> Dict[str, str]:
+        '''return a dict like get_transport_info() used to return'''
+        return {'state': self.state, 'status': self.status, 'speed': self.speed}
+
+
+class TrackInfo(Mapping[str, Any]):
+    '''Information about the currently playing track on a player.
+
+    Behaves like a read-only dict with keys title, artist, album,
+    album_art, position, playlist_position, duration, uri, and metadata.
+    The raw track metadata is only parsed (by calling parse_metadata)
+    when one of the keys that come from it (title, artist, album,
+    album_art) is first needed. Use parsers.track_info() to create one.
+    '''
+    __slots__ = ('_result', '_parse_metadata', '_metadata_fields')
+
+    _keys = (
+        'title', 'artist', 'album', 'album_art',
+        'position', 'playlist_position', 'duration', 'uri', 'metadata')
+
+    # keys that come straight from the GetPositionInfo result
+    _result_keys = {
+        'position': 'RelTime',
+        'playlist_position': 'Track',
+        'duration': 'TrackDuration',
+        'uri': 'TrackURI',
+        # The entire metadata entry, which can be used if needed by the
+        # client to restart a given URI
+        'metadata': 'TrackMetaData',
+    }
+
+    def __init__(
+            self,
+            result: Dict[str, Any],
+            parse_metadata: Callable[[], Dict[str, str]]):
+        self._result = result
+        self._parse_metadata = parse_metadata
+        self._metadata_fields: Optional[Dict[str, str]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        result_key = self._result_keys.get(key)
+        if result_key is not None:
+            return self._result[result_key]
+        fields = self._metadata_fields
+        if fields is None:
+            fields = self._metadata_fields = self._parse_metadata()
+        return fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __str__(self) -> str:
+        return f'{self["title"]} ({self["artist"]})'
+
+    def __repr__(self) -> str:
+        # don't use str(self): that would parse the metadata
+        return (f'<{self.__class__.__name__} at {id(self):x}: '
+                f'{self._result["TrackURI"]} @ {self._result["RelTime"]}>')
@@ -1,8 +1,10 @@
 '''parse Sonos XML and turn it into useful model objects'''
 
+import functools
 import logging
+import re
 from xml.etree import ElementTree
-from typing import Union, Any, Dict, List
+from typing import Union, Any, Dict, List, Optional, Tuple
 
 from didl_lite import didl_lite as didl
 
@@ -10,6 +12,46 @@ from . import models
 
 log = logging.getLogger(__name__)
 
+# Tags and paths used on every UPnP event, computed once rather than on
+# every call to parse_event_body() or parse_last_change().
+_PROPERTY_VARIABLES = '{urn:schemas-upnp-org:event-1-0}property/*'
+
+# InstanceID can be in one of two namespaces, depending on whether we are
+# looking at an avTransport event or a renderingControl event; Queue events
+# use QueueID instead.
+_INSTANCE_TAGS = frozenset((
+    '{urn:schemas-upnp-org:metadata-1-0/AVT/}InstanceID',
+    '{urn:schemas-upnp-org:metadata-1-0/RCS/}InstanceID',
+    '{urn:schemas-sonos-com:metadata-1-0/Queue/}QueueID',
+))
+
+# Extract the host from a ZoneGroupMember's Location attribute, eg.
+# "http://192.168.1.101:1400/xml/device_description.xml"
+_LOCATION_RE = re.compile(r'//([^:/]+)')
+
+# paths for finding things in track metadata (DIDL-Lite)
+_XPATH_TITLE = './/{http://purl.org/dc/elements/1.1/}title'
+_XPATH_CREATOR = './/{http://purl.org/dc/elements/1.1/}creator'
+_XPATH_ALBUM = './/{urn:schemas-upnp-org:metadata-1-0/upnp/}album'
+_XPATH_ALBUM_ART = './/{urn:schemas-upnp-org:metadata-1-0/upnp/}albumArtURI'
+_XPATH_STREAM_CONTENT = './/{urn:schemas-rinconnetworks-com:metadata-1-0/}streamContent'
+
+# TrackMetaData values that mean "no metadata"
+_NO_METADATA = frozenset(('', 'NOT_IMPLEMENTED', None))
+
+# Map from a tag in Clark notation ("{namespace}local") to just the local
+# part. LastChange events use the same few dozen tags over and over, so
+# this stays small.
+_LOCALNAME_CACHE: Dict[str, str] = {}
+
+
+def _localname(tag: str) -> str:
+    '''Return tag with any namespace removed.'''
+    local = _LOCALNAME_CACHE.get(tag)
+    if local is None:
+        local = _LOCALNAME_CACHE[tag] = tag.rpartition('}')[2]
+    return local
+
 
 def parse_player_description(description_xml: str) -> models.PlayerDescription:
     # GET /xml/device_description.xml returns something like this:
@@ -52,6 +94,68 @@ def parse_player_description(description_xml: str) -> models.PlayerDescription:
     return desc
 
 
+def parse_track_metadata(metadata: str, duration: str) -> Dict[str, str]:
+    '''Parse the TrackMetaData returned by GetPositionInfo.
+
+    Returns a dict with keys title, artist, album, and album_art (a URL,
+    possibly relative to the player). Any of them may be '' if the
+    metadata does not say.
+    '''
+    (title, artist, album, album_art) = _parse_track_metadata(metadata, duration)
+    return {
+        'title': title,
+        'artist': artist,
+        'album': album,
+        'album_art': album_art,
+    }
+
+
+def track_info(player: models.Player, result: Dict[str, Any]) -> models.TrackInfo:
+    '''Wrap a GetPositionInfo result from player in a TrackInfo, which
+    only parses the track metadata if it is actually needed.'''
+    def parse_metadata() -> Dict[str, str]:
+        fields = parse_track_metadata(result['TrackMetaData'], result['TrackDuration'])
+        fields['album_art'] = player.get_url(fields['album_art'])
+        return fields
+
+    return models.TrackInfo(result, parse_metadata)
+
+
+# Clients tend to poll GetPositionInfo (eg. to show progress), and the
+# metadata only changes when the track does: so remember the last few.
+@functools.lru_cache(maxsize=8)
+def _parse_track_metadata(metadata: str, duration: str) -> Tuple[str, str, str, str]:
+    # If the speaker is playing from the line-in source, querying for track
+    # metadata will return 'NOT_IMPLEMENTED'.
+    if metadata in _NO_METADATA:
+        return ('', '', '', '')
+
+    # Otherwise, track metadata is returned in DIDL-Lite format.
+    root = ElementTree.fromstring(metadata)
+    title = artist = album = album_art = ''
+
+    # Duration seems to be '0:00:00' when listening to radio
+    if duration == '0:00:00':
+        # Try parse trackinfo
+        trackinfo = root.findtext(_XPATH_STREAM_CONTENT) or ''
+        index = trackinfo.find(' - ')
+
+        if index > -1:
+            artist = trackinfo[:index]
+            title = trackinfo[index + 3:]
+        else:
+            # Might find some kind of title anyway in metadata
+            title = root.findtext(_XPATH_TITLE) or trackinfo
+
+    else:
+        title = root.findtext(_XPATH_TITLE) or ''
+        artist = root.findtext(_XPATH_CREATOR) or ''
+        album = root.findtext(_XPATH_ALBUM) or ''
+        album_art = root.findtext(_XPATH_ALBUM_ART) or ''
+
+    return (title, artist, album, album_art)
+
+
 def parse_group_state(groups_xml: str) -> models.Network:
     """
     :return: (groups, visible_players, all_players)
@@ -95,21 +199,31 @@ def parse_group_state(groups_xml: str) -> models.Network:
     # </ZoneGroups>
     #
 
-    groups = list()
-    visible_players = list()
-    all_players = list()
-
-    def parse_member(member_element: ElementTree.Element) -> models.Player:
+    groups: List[models.Group] = list()
+    visible_players: List[models.Player] = list()
+    all_players: List[models.Player] = list()
+    add_visible = visible_players.append
+    add_player = all_players.append
+    add_group = groups.append
+    get_player = models.Player.get_instance
+    Group = models.Group
+
+    def parse_member(
+            member_element: ElementTree.Element,
+    ) -> Tuple[models.Player, Dict[str, str]]:
         """Parse a ZoneGroupMember or Satellite element from Zone Group
         State, create a SoCo instance for the member, set basic attributes
-        and return it."""
+        and return it (along with the element's attributes)."""
         # Get (or create) the Player instance for each member. This is
         # cheap if they have already been created, and useful if they
         # haven't. We can then update various properties for that
         # instance.
         member_attribs = member_element.attrib
-        ip_addr = member_attribs["Location"].split("//")[1].split(":")[0]
-        player = models.Player.get_instance(ip_addr)
+        location = member_attribs["Location"]
+        match = _LOCATION_RE.search(location)
+        assert match is not None, f'could not find host in Location {location!r}'
+        ip_addr = match.group(1)
+        player = get_player(ip_addr)
         # uid doesn't change, but it's not harmful to (re)set it, in case
         # the player is as yet unseen.
         player.uuid = member_attribs["UUID"]
@@ -118,22 +232,21 @@ def parse_group_state(groups_xml: str) -> models.Network:
         # of visible members if appropriate
         is_visible = member_attribs.get("Invisible") != "1"
         if is_visible:
-            visible_players.append(player)
-        all_players.append(player)
-        return player
-
-    tree = ElementTree.fromstring(groups_xml)
-
-    # Loop over each ZoneGroup Element
-    zg_element = tree.find('ZoneGroups')
-    assert zg_element is not None, 'no ZoneGroups element'
-    for group_element in zg_element.findall("ZoneGroup"):
-        coordinator_uuid = group_element.attrib["Coordinator"]
-        group_uuid = group_element.attrib["ID"]
+            add_visible(player)
+        add_player(player)
+        return (player, member_attribs)
+
+    def parse_group(group_element: ElementTree.Element) -> None:
+        """Parse a ZoneGroup element, and add the resulting Group to groups
+        (if it has a coordinator)."""
+        group_attribs = group_element.attrib
+        coordinator_uuid = group_attribs["Coordinator"]
+        group_uuid = group_attribs["ID"]
         group_coordinator = None
         members: List[models.Player] = list()
+        add_member = members.append
         for member_element in group_element.findall("ZoneGroupMember"):
-            player = parse_member(member_element)
+            (player, member_attribs) = parse_member(member_element)
             # Perform extra processing relevant to direct zone group
             # members
             #
@@ -147,32 +260,74 @@ def parse_group_state(groups_xml: str) -> models.Network:
             # is_bridge doesn't change, but it does no real harm to
             # set/reset it here, just in case the player has not been seen
             # before
-            player.is_bridge = member_element.attrib.get("IsZoneBridge") == "1"
+            player.is_bridge = member_attribs.get("IsZoneBridge") == "1"
             # add the player to the members for this group
-            members.append(player)
+            add_member(player)
             # Loop over Satellite elements if present, and process as for
             # ZoneGroup elements
             for satellite_element in member_element.findall("Satellite"):
-                player = parse_member(satellite_element)
+                (player, _) = parse_member(satellite_element)
                 # Assume a satellite can't be a bridge or coordinator, so
                 # no need to check.
                 #
                 # Add the player to the members for this group.
-                members.append(player)
-            # Now create a Group with this info and add it to the list
-            # of groups
+                add_member(player)
         if group_coordinator is None:
-            log.warn(
+            log.warning(
                 'Found group with no coordinator (player offline?): '
                 'group ID %s, coordinator ID %s',
                 group_uuid, coordinator_uuid)
-            continue
+            return
 
-        groups.append(models.Group(group_uuid, group_coordinator, members))
+        # Now create a Group with this info and add it to the list
+        # of groups
+        add_group(Group(group_uuid, group_coordinator, members))
+
+    tree = ElementTree.fromstring(groups_xml)
+
+    # Loop over each ZoneGroup Element
+    zg_element = tree.find('ZoneGroups')
+    assert zg_element is not None, 'no ZoneGroups element'
+    for group_element in zg_element.findall('ZoneGroup'):
+        parse_group(group_element)
 
     return models.Network(groups, visible_players, all_players)
 
 
+# the most recent (groups_xml, network) seen by parse_group_state_cached()
+_last_group_state: Tuple[Optional[str], Optional[models.Network]] = (None, None)
+
+
+def parse_group_state_cached(groups_xml: str) -> models.Network:
+    '''Like parse_group_state(), but if groups_xml is the same as last time,
+    return the same Network rather than parsing it again.
+
+    Sonos sends the same ZoneGroupState over and over (to every subscriber,
+    on every renewal, and in answer to every GetZoneGroupState), so this
+    saves a lot of parsing. Only one result is remembered: parsing updates
+    the Player objects as a side effect, so returning an older result
+    could undo a more recent topology change.
+
+    For the same reason, only ever pass the ZoneGroupState that has just
+    been received (from an event or a GetZoneGroupState response), never
+    one saved from earlier: parsing stale XML would set the Players back
+    to the old topology.
+    '''
+    global _last_group_state
+    (last_xml, last_network) = _last_group_state
+    if last_network is not None and groups_xml == last_xml:
+        return last_network
+    network = parse_group_state(groups_xml)
+    _last_group_state = (groups_xml, network)
+    return network
+
+
+def get_last_group_state() -> Optional[models.Network]:
+    '''Return the Network most recently returned by parse_group_state_cached()
+    (from an event or from GetZoneGroupState), or None.'''
+    return _last_group_state[1]
+
+
 def parse_event_body(body: bytes) -> Dict[str, Any]:
     '''Parse the body of a UPnP event.
 
@@ -188,6 +343,7 @@ def parse_event_body(body: bytes) -> Dict[str, Any]:
         * a dict (eg when the volume changes, the value will itself be a
           dict containing the volume for each channel:
           :code:`{'Volume': {'LF': '100', 'RF': '100', 'Master': '36'}}`)
+        * a `models.Network` (for ZoneGroupState)
         * an instance of a `DidlObject` subclass (eg if it represents
           track metadata).
         * a `SoCoFault` (if a variable contains illegal metadata)
@@ -195,24 +351,26 @@ def parse_event_body(body: bytes) -> Dict[str, Any]:
 
     result = {}
     tree = ElementTree.fromstring(body)
-    # property values are just under the propertyset, which
-    # uses this namespace
-    properties = tree.findall('{urn:schemas-upnp-org:event-1-0}property')
-    for prop in properties:
-        for variable in prop:
-            # Special handling for a LastChange event specially. For details on
-            # LastChange events, see
-            # http://upnp.org/specs/av/UPnP-av-RenderingControl-v1-Service.pdf
-            # and http://upnp.org/specs/av/UPnP-av-AVTransport-v1-Service.pdf
-            if variable.tag == 'LastChange':
-                assert variable.text is not None, '<LastChange> element with no text'
-                result.update(parse_last_change(variable.text))
-            elif variable.tag == 'ZoneGroupState':
-                assert variable.text is not None, '<ZoneGroupState> element with no text'
-                result[variable.tag] = parse_group_state(variable.text)
-            else:
-                result[variable.tag] = variable.text
-            # result[variable.tag] = variable.text
+    # property values are just under the propertyset, one (or more) per
+    # <property> element
+    for variable in tree.iterfind(_PROPERTY_VARIABLES):
+        tag = variable.tag
+        text = variable.text
+        # Special handling for a LastChange event specially. For details on
+        # LastChange events, see
+        # http://upnp.org/specs/av/UPnP-av-RenderingControl-v1-Service.pdf
+        # and http://upnp.org/specs/av/UPnP-av-AVTransport-v1-Service.pdf
+        if tag == 'LastChange':
+            assert text is not None, '<LastChange> element with no text'
+            result.update(parse_last_change(text))
+        elif tag == 'ZoneGroupState':
+            assert text is not None, '<ZoneGroupState> element with no text'
+            # Parse it now, while it's the latest topology: parsing updates
+            # the shared Player objects, so it must happen in the order
+            # the events arrive.
+            result[tag] = parse_group_state_cached(text)
+        else:
+            result[tag] = text
 
     return result
 
@@ -225,19 +383,12 @@ def parse_last_change(text: str) -> Dict[str, Any]:
     '''
     tree = ElementTree.fromstring(text)
     # We assume there is only one InstanceID tag. This is true for
-    # Sonos, as far as we know.
-    # InstanceID can be in one of two namespaces, depending on
-    # whether we are looking at an avTransport event, a
-    # renderingControl event, or a Queue event
-    # (there, it is named QueueID)
-    paths = [
-        '{urn:schemas-upnp-org:metadata-1-0/AVT/}InstanceID',
-        '{urn:schemas-upnp-org:metadata-1-0/RCS/}InstanceID',
-        '{urn:schemas-sonos-com:metadata-1-0/Queue/}QueueID',
-    ]
-    for path in paths:
-        instance = tree.find(path)
-        if instance is not None:
+    # Sonos, as far as we know. It's a direct child of the root element,
+    # so one pass over the root's children will find it.
+    instance = None
+    for child in tree:
+        if child.tag in _INSTANCE_TAGS:
+            instance = child
             break
     assert instance is not None, \
         'could not find InstanceID or QueueID in <LastChange> element'
@@ -245,10 +396,8 @@ def parse_last_change(text: str) -> Dict[str, Any]:
     # Look at each variable within the LastChange event
     result: Dict[str, Any] = {}
     for variable in instance:
-        tag = variable.tag
         # Remove any namespaces from the tags
-        if tag.startswith('{'):
-            tag = tag.split('}', 1)[1]
+        tag = _localname(variable.tag)
 
         # Now extract the relevant value for the variable.
         # The UPnP specs suggest that the value of any variable
@@ -258,24 +407,24 @@ def parse_last_change(text: str) -> Dict[str, Any]:
         # sometimes uses a text value instead: see
         # http://forums.sonos.com/showthread.php?t=34663
         value: Union[None, str, didl.DidlObject]
-        value = variable.get('val')
+        get = variable.get
+        value = get('val')
         if value is None:
             value = variable.text
         assert value is not None
 
         # If DIDL metadata is returned, convert it to a music library data
-        # structure.
-        if value.startswith('<DIDL-Lite'):
+        # structure. (Most values are short strings like "0" or "STOPPED",
+        # so check the first character before doing the full comparison.)
+        if value[:1] == '<' and value.startswith('<DIDL-Lite'):
             didl_items = parse_didl(value)
             if didl_items:
                 value = didl_items[0]
             else:
                 value = None
-        channel = variable.get('channel')
+        channel = get('channel')
         if channel is not None:
-            if result.get(tag) is None:
-                result[tag] = {}
-            result[tag][channel] = value
+            result.setdefault(tag, {})[channel] = value
         else:
             result[tag] = value
 
@@ -293,11 +442,11 @@ def parse_didl(didl_xml: str) -> List[didl.DidlObject]:
     Returns:
         list: A list of one or more instances of `DIDLObject` or a subclass
     '''
-    items = []
-    for item in didl.from_xml_string(didl_xml, strict=False):
-        # Sonos does not appear to use didl_lite:desc, so we should never
-        # receive Descriptor objects from the didl_lite library. Use that
-        # fact to simplify the type signature a bit.
-        assert isinstance(item, didl.DidlObject)
-        items.append(item)
-    return items
+    # Sonos does not appear to use didl_lite:desc, so we should never
+    # receive Descriptor objects from the didl_lite library. Filter them
+    # out anyways: that keeps the type signature simple.
+    return [
+        item
+        for item in didl.from_xml_string(didl_xml, strict=False)
+        if isinstance(item, didl.DidlObject)
+    ]
@@ -3,8 +3,10 @@
 import asyncio
 import datetime
 import logging
+import signal
 import socket
 import sys
+from typing import Optional, Tuple
 
 import click
 from didl_lite import didl_lite as didl
@@ -14,6 +16,17 @@ from . import event, models, sonos, upnp
 
 _debug: int = 0
 
+# map --debug value to log level for the aiosonos logger
+_LEVEL_MAP = {
+    0: logging.WARNING,
+    1: logging.INFO,
+    2: logging.DEBUG,
+    3: logging.DEBUG - 1,      # log request/response bodies too
+}
+
+# the player found by _get_network(), so we only do discovery once
+_player: Optional[models.Player] = None
+
 
 @click.group()
 @click.option('--debug', default=0, help='Print more detailed information')
@@ -21,17 +34,14 @@ def main(debug):
     global _debug
     _debug = debug
 
-    logging.basicConfig(
-        format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
-        level=logging.WARNING,
-        stream=sys.stderr)
-    level_map = {
-        0: logging.WARNING,
-        1: logging.INFO,
-        2: logging.DEBUG,
-        3: logging.DEBUG - 1,      # log request/response bodies too
-    }
-    level = level_map.get(debug, logging.DEBUG - 1)
+    # leave logging alone if it's already configured (eg. if we are being
+    # called from a script that has set things up already)
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
+            level=logging.WARNING,
+            stream=sys.stderr)
+    level = _LEVEL_MAP.get(debug, logging.DEBUG - 1)
     logging.getLogger('aiosonos').setLevel(level)
 
 
@@ -81,10 +91,35 @@ async def _discover_one(timeout: float, details: bool):
 
 
 async def _discover_all(timeout: float, details: bool):
-    try:
-        async for player in await sonos.discover_all(timeout):
+    # Show each player (which may mean fetching its description) as soon as
+    # it responds, while we wait for more responses -- but don't hit the
+    # network with too many requests at once.
+    limit = asyncio.Semaphore(8)
+
+    async def show_player(player: models.Player):
+        async with limit:
             await _show_player(player, details)
+
+    players = []
+    tasks = []
+    try:
+        async for player in sonos.discover_all(timeout):
+            players.append(player)
+            tasks.append(asyncio.ensure_future(show_player(player)))
+
+        # One player that we can't talk to should not stop us showing the
+        # others.
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for (player, result) in zip(players, results):
+            if isinstance(result, Exception):
+                print(f'sntool: warning: could not show {player}: {result}',
+                      file=sys.stderr)
     finally:
+        # Don't close the session under any tasks that are still running
+        # (eg. if discovery itself failed).
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         await sonos.close()
 
 
@@ -96,13 +131,23 @@ async def _show_player(player: models.Player, details: bool):
         print(f'{player.ip_address}')
 
 
+async def _get_network() -> Tuple[models.Player, models.Network]:
+    '''Discover one player (only the first time), and get the network
+    topology from it (cached briefly by sonos.get_group_state()).'''
+    global _player
+    if _player is None:
+        _player = await sonos.discover_one()
+    network = await sonos.get_group_state(_player)
+    return (_player, network)
+
+
 async def _groups():
-    player = await sonos.discover_one()
-    network = await sonos.get_group_state(player)
+    (_, network) = await _get_network()
+    lines = []
     for group in network.groups:
-        print(group)
-        for player in group.members:
-            print('  ' + player.describe())
+        lines.append(f'{group}\n')
+        lines.extend(f'  {player.describe()}\n' for player in group.members)
+    sys.stdout.write(''.join(lines))
     await sonos.close()
 
 
@@ -110,14 +155,15 @@ async def _queue_list(target: str):
     try:
         player = await _resolve_target(target)
         tracks = await sonos.get_queue(player)
-        for track in tracks:
-            print(
-                f'{track.queue_pos} '
-                + f'{track.artist!r} '
-                + f'{track.album!r} '
-                + f'{track.title!r} '
-                + f'{track.track_uri}'
-            )
+        # queues can be long: write them out in one go, not line-by-line
+        sys.stdout.write(''.join([
+            f'{track.queue_pos} '
+            f'{track.artist!r} '
+            f'{track.album!r} '
+            f'{track.title!r} '
+            f'{track.track_uri}\n'
+            for track in tracks
+        ]))
     finally:
         await sonos.close()
 
@@ -132,24 +178,28 @@ async def _queue_clear(target: str):
 
 async def _monitor():
     def ts():
-        return str(datetime.datetime.now())
+        # same as str(), but always with microseconds (and quicker)
+        return datetime.datetime.now().isoformat(sep=' ', timespec='microseconds')
 
     def topology_cb(event: event.Event):
         network = event.properties.get('ZoneGroupState')
         details = ''
-        if isinstance(network, models.Network):
+        if network is not None:
             details = (': group coordinators: ' +
                        ','.join(coord.ip_address for coord in network.get_coordinators()))
         print(f'{ts()} received {event.service_type} event: '
               f'player {event.player}{details}')
 
+    MusicTrack = didl.MusicTrack
+
     def transport_cb(event: event.Event):
-        transport_state = event.properties['TransportState']
-        track_num = event.properties['CurrentTrack']
-        track_duration = event.properties['CurrentTrackDuration']
-        track = event.properties['CurrentTrackMetaData']
+        properties = event.properties
+        transport_state = properties['TransportState']
+        track_num = properties['CurrentTrack']
+        track_duration = properties['CurrentTrackDuration']
+        track = properties['CurrentTrackMetaData']
         details = ' (no track metadata)'
-        if isinstance(track, didl.MusicTrack):
+        if isinstance(track, MusicTrack):
             details = (f': track {track_num} '
                        f'{track.creator!r} {track.title!r} {track_duration}')
         print(f'{ts()} received {event.service_type} event: '
@@ -158,21 +208,39 @@ async def _monitor():
     # Get all groups and subscribe to interesting events.
     try:
         # Only need topology events from one player.
-        player = await sonos.discover_one()
+        (player, network) = await _get_network()
         await sonos.subscribe(
             player, upnp.SERVICE_TOPOLOGY, topology_cb, auto_renew=True)
 
-        # For other events, subscribe to each group coordinator.
-        network = await sonos.get_group_state(player)
-        for group in network.groups:
-            await sonos.subscribe(
-                group.coordinator,
+        # For other events, subscribe to each group coordinator (all at
+        # once, rather than waiting for each one in turn). One unreachable
+        # coordinator should not stop us monitoring the others.
+        coordinators = network.get_coordinators()
+        results = await asyncio.gather(
+            *[sonos.subscribe(
+                coordinator,
                 upnp.SERVICE_AVTRANSPORT,
                 transport_cb,
                 auto_renew=True)
-
-        while True:
-            await asyncio.sleep(1)
+              for coordinator in coordinators],
+            return_exceptions=True)
+        for (coordinator, result) in zip(coordinators, results):
+            if isinstance(result, Exception):
+                print(f'sntool: warning: could not subscribe to {coordinator}: '
+                      f'{result}',
+                      file=sys.stderr)
+
+        # Nothing more to do until we're told to stop: all the work happens
+        # in the event callbacks.
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                # Windows: Ctrl-C still raises KeyboardInterrupt
+                pass
+        await stop.wait()
 
     finally:
         await sonos.close()
@@ -181,28 +249,24 @@ async def _monitor():
 async def _resolve_target(target: str) -> models.Player:
     # If it looks like a hostname or IP address, then assume that it is.
     # This accepts bogus or non-existent IP addresses!
+    # (Resolve it in the loop's executor, so a slow DNS lookup does not
+    # block the event loop.)
+    loop = asyncio.get_running_loop()
     try:
-        addr = socket.gethostbyname(target)  # XXX blocking I/O!
-        return models.Player(addr)
+        infos = await loop.getaddrinfo(
+            target, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        addr = str(infos[0][4][0])
+        return models.Player.get_instance(addr)
     except socket.gaierror:
         pass
 
     # Otherwise, discover the local Sonos network and try to resolve the
     # target name there.
-    player = await sonos.discover_one()
-    network = await sonos.get_group_state(player)
-    for group in network.groups:
-        coordinator = group.coordinator
-        if group.uuid == target:
-            return coordinator
-        if coordinator.uuid == target:
-            return coordinator
-        if coordinator.ip_address == target:
-            return coordinator
-        if coordinator.name is not None and target.lower() in coordinator.name.lower():
-            return coordinator
-    else:
+    (_, network) = await _get_network()
+    coordinator = network.find_coordinator(target)
+    if coordinator is None:
         sys.exit(f'sntool: error: found no group identified by "{target}"')
+    return coordinator
 
 
 if __name__ == '__main__':
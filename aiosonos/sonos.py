@@ -9,9 +9,10 @@ are writing code that will be used elsewhere in aiosonos, this is the wrong
 place.
 '''
 
+import asyncio
 import logging
-from xml.etree import ElementTree
-from typing import Any, AsyncGenerator, Dict, List
+import time
+from typing import AsyncGenerator, Dict, List, Tuple
 
 from didl_lite import didl_lite as didl
 
@@ -19,6 +20,17 @@ from . import models, upnp, discover, event, parsers, utils
 
 log = logging.getLogger(__name__)
 
+# how long (in seconds) get_group_state() reuses a previous result
+GROUP_STATE_TTL = 5.0
+
+# map from player IP address to (time fetched, network)
+_group_state_cache: Dict[str, Tuple[float, models.Network]] = {}
+
+# arguments for commands that always take the same arguments
+_POSITION_INFO_ARGS = (('InstanceID', 0), ('Channel', 'Master'))
+_INSTANCE_ARGS = (('InstanceID', 0),)
+_TRANSPORT_ARGS = (('InstanceID', 0), ('Speed', 1))
+
 
 async def discover_one(timeout: float = 1.0) -> models.Player:
     '''Discover the local Sonos network and return one arbitrary Player.
@@ -31,13 +43,17 @@ async def discover_one(timeout: float = 1.0) -> models.Player:
 
 
 async def discover_all(timeout: float = 1.0) -> AsyncGenerator[models.Player, None]:
-    '''Discover the local Sonos network and return one arbitrary Player.
+    '''Discover the local Sonos network and yield every Player found.
 
-    Send a UPnP discovery packet and wait for responses to arrive. As soon
-    as one arrives, construct a Player object based on that response and
-    return it. Ignore any further responses.
+    Send a UPnP discovery packet and wait for responses to arrive. Yield a
+    Player object for each response as soon as it arrives; stop when no
+    response has arrived for ``timeout`` seconds. Use it like this::
+
+        async for player in sonos.discover_all():
+            ...
     '''
-    return discover.discover_all(timeout)
+    async for player in discover.discover_all(timeout):
+        yield player
 
 
 def get_player(ip_address: str) -> models.Player:
@@ -48,7 +64,8 @@ def get_player(ip_address: str) -> models.Player:
 
     This function has singleton-like semantics: if a Player does not yet
     exist for ``ip_address``, create and return one; for a given
-    ``ip_address``, always return the same object.
+    ``ip_address``, always return the same object (as long as that object
+    is still referenced somewhere).
     '''
     return models.Player.get_instance(ip_address)
 
@@ -64,28 +81,39 @@ async def get_player_description(player: models.Player) -> models.PlayerDescript
 
 
 async def get_group_state(player: models.Player) -> models.Network:
+    '''Ask player for the current topology of the Sonos network.
 
-    # # XXX SoCo caches both the raw XML and the parsed result: worth it?
-    # now = time.monotonic()
-    # if (self._group_state_update is not None and
-    #         now - self._group_state_update <= self.group_state_ttl):
-    #     return
+    The topology rarely changes, so a result less than GROUP_STATE_TTL
+    seconds old is reused rather than asking the player again -- unless
+    a different topology has been seen since (eg. in a ZoneGroupState
+    event), in which case the player is asked again.
+    '''
+    now = time.monotonic()
+    cached = _group_state_cache.get(player.ip_address)
+    if (cached is not None and
+            now - cached[0] <= GROUP_STATE_TTL and
+            cached[1] is parsers.get_last_group_state()):
+        return cached[1]
 
     client = upnp.get_upnp_client(player)
     result = await client.send_command(
         upnp.SERVICE_TOPOLOGY,
         'GetZoneGroupState')
     groups_xml = result['ZoneGroupState']
-    return parsers.parse_group_state(groups_xml)
+    network = parsers.parse_group_state_cached(groups_xml)
+    _group_state_cache[player.ip_address] = (now, network)
+    return network
 
 
-async def get_current_track_info(player: models.Player) -> Dict[str, Any]:
+async def get_current_track_info(player: models.Player) -> models.TrackInfo:
     '''Get information about the currently playing track.
 
     Returns:
-        dict: A dictionary containing information about the currently
-        playing track: playlist_position, duration, title, artist, album,
-        position and an album_art link.
+        TrackInfo: A read-only dict-like object containing information
+        about the currently playing track: playlist_position, duration,
+        title, artist, album, position and an album_art link. The track
+        metadata is only parsed if you look at title, artist, album, or
+        album_art.
 
     If we're unable to return data for a field, we'll return an empty
     string. This can happen for all kinds of reasons so be sure to check
@@ -101,93 +129,24 @@ async def get_current_track_info(player: models.Player) -> Dict[str, Any]:
     result = await client.send_command(
         upnp.SERVICE_AVTRANSPORT,
         'GetPositionInfo',
-        [('InstanceID', 0), ('Channel', 'Master')]
+        _POSITION_INFO_ARGS,
     )
-    track = _parse_track_info(result)
-    track['album_art'] = player.get_url(track['album_art'])
-    return track
-
-
-def _parse_track_info(result: Dict[str, Any]) -> Dict[str, Any]:
-    track = {
-        'title': '',
-        'artist': '',
-        'album': '',
-        'album_art': '',
-        'position': '',
-    }
-    track['playlist_position'] = result['Track']
-    track['duration'] = result['TrackDuration']
-    track['uri'] = result['TrackURI']
-    track['position'] = result['RelTime']
-
-    metadata = result['TrackMetaData']
-    # Store the entire Metadata entry in the track, this can then be
-    # used if needed by the client to restart a given URI
-    track['metadata'] = metadata
-    # Duration seems to be '0:00:00' when listening to radio
-    if metadata != '' and track['duration'] == '0:00:00':
-        metadata = ElementTree.fromstring(metadata)
-        # Try parse trackinfo
-        trackinfo = (
-            metadata.findtext(
-                './/{urn:schemas-rinconnetworks-com:' 'metadata-1-0/}streamContent'
-            )
-            or ''
-        )
-        index = trackinfo.find(' - ')
-
-        if index > -1:
-            track['artist'] = trackinfo[:index]
-            track['title'] = trackinfo[index + 3:]
-        else:
-            # Might find some kind of title anyway in metadata
-            track['title'] = metadata.findtext(
-                './/{http://purl.org/dc/' 'elements/1.1/}title'
-            )
-            if not track['title']:
-                track['title'] = trackinfo
-
-    # If the speaker is playing from the line-in source, querying for track
-    # metadata will return 'NOT_IMPLEMENTED'.
-    elif metadata not in ('', 'NOT_IMPLEMENTED', None):
-        # Track metadata is returned in DIDL-Lite format
-        metadata = ElementTree.fromstring(metadata)
-        md_title = metadata.findtext('.//{http://purl.org/dc/elements/1.1/}title')
-        md_artist = metadata.findtext(
-            './/{http://purl.org/dc/elements/1.1/}creator'
-        )
-        md_album = metadata.findtext(
-            './/{urn:schemas-upnp-org:metadata-1-0/upnp/}album'
-        )
-
-        track['title'] = ''
-        if md_title:
-            track['title'] = md_title
-        track['artist'] = ''
-        if md_artist:
-            track['artist'] = md_artist
-        track['album'] = ''
-        if md_album:
-            track['album'] = md_album
-
-        track['album_art'] = metadata.findtext(
-            './/{urn:schemas-upnp-org:metadata-1-0/upnp/}albumArtURI')
-
-    return track
-
-
-async def get_transport_info(player: models.Player) -> Dict[str, Any]:
+    return parsers.track_info(player, result)
+
+
+async def get_transport_info(player: models.Player) -> models.TransportInfo:
     '''Get the current playback state.
 
     Returns:
-        dict: The following information about the
+        TransportInfo: The following information about the
         speaker's playing state:
 
         *   state (``PLAYING``, ``TRANSITIONING``, ``PAUSED_PLAYBACK``, ``STOPPED``)
         *   status (OK, ?)
         *   speed(1, ?)
 
+        (Use its asdict() method if you need a dict.)
+
     This allows us to know if speaker is playing or not. Other values for
     status and speed are unknown.
     '''
@@ -195,14 +154,31 @@ async def get_transport_info(player: models.Player) -> Dict[str, Any]:
     result = await client.send_command(
         upnp.SERVICE_AVTRANSPORT,
         'GetTransportInfo',
-        [('InstanceID', 0)],
+        _INSTANCE_ARGS,
+    )
+
+    return models.TransportInfo(
+        state=result['CurrentTransportState'],
+        status=result['CurrentTransportStatus'],
+        speed=result['CurrentSpeed'],
     )
 
-    return {
-        'state': result['CurrentTransportState'],
-        'status': result['CurrentTransportStatus'],
-        'speed': result['CurrentSpeed'],
-    }
+
+async def get_now_playing(
+        player: models.Player) -> Tuple[models.TrackInfo, models.TransportInfo]:
+    '''Get the current track and the current playback state together.
+
+    Equivalent to calling get_current_track_info() and get_transport_info(),
+    but sends both requests at once rather than waiting for the first
+    response before sending the second.
+
+    Returns:
+        tuple: (track_info, transport_info)
+    '''
+    (track_info, transport_info) = await asyncio.gather(
+        get_current_track_info(player),
+        get_transport_info(player))
+    return (track_info, transport_info)
 
 
 async def play(player: models.Player):
@@ -223,10 +199,7 @@ async def _simple_avtransport_command(player: models.Player, command: str):
     await client.send_command(
         upnp.SERVICE_AVTRANSPORT,
         command,
-        [
-            ('InstanceID', 0),
-            ('Speed', 1),
-        ],
+        _TRANSPORT_ARGS,
     )
 
 
@@ -257,33 +230,17 @@ async def get_queue(
         ],
     )
 
-    items = parsers.parse_didl(result['Result'])
-
-    tracks: List[models.Track] = []
-    for item in items:
-        if isinstance(item, didl.MusicTrack):
-            queue_pos = -1
-            if isinstance(item.id, str) and '/' in item.id:
-                queue_pos = int(item.id.split('/')[1])      # parse "Q:0/5" to 5
-            album_art_uri = player.get_url(item.album_art_uri)
-
-            duration = -1
-            if item.res and item.res[0].duration is not None:
-                duration = parse_time(item.res[0].duration)
-
-            track_uri = None
-            if item.res and item.res[0].uri is not None:
-                track_uri = item.res[0].uri
-
-            tracks.append(models.Track(
-                artist=item.creator,
-                album=item.album,
-                title=item.title,
-                duration=duration,
-                track_uri=track_uri,
-                album_art_uri=album_art_uri,
-                queue_pos=queue_pos,
-            ))
+    # A long queue is a lot of DIDL-Lite to parse: do it in a worker
+    # thread, so we're not holding up everything else on the event loop.
+    loop = asyncio.get_running_loop()
+    items = await loop.run_in_executor(None, parsers.parse_didl, result['Result'])
+
+    MusicTrack = didl.MusicTrack
+    tracks = [
+        _make_track(player, item)
+        for item in items
+        if isinstance(item, MusicTrack)
+    ]
 
     return models.TrackList(
         tracks,
@@ -293,14 +250,37 @@ async def get_queue(
     )
 
 
+def _make_track(player: models.Player, item: didl.MusicTrack) -> models.Track:
+    queue_pos = -1
+    if isinstance(item.id, str) and '/' in item.id:
+        queue_pos = int(item.id.split('/')[1])      # parse "Q:0/5" to 5
+    album_art_uri = player.get_url(item.album_art_uri)
+
+    duration = -1
+    if item.res and item.res[0].duration is not None:
+        duration = parse_time(item.res[0].duration)
+
+    track_uri = None
+    if item.res and item.res[0].uri is not None:
+        track_uri = item.res[0].uri
+
+    return models.Track(
+        artist=item.creator,
+        album=item.album,
+        title=item.title,
+        duration=duration,
+        track_uri=track_uri,
+        album_art_uri=album_art_uri,
+        queue_pos=queue_pos,
+    )
+
+
 async def clear_queue(player: models.Player):
     client = upnp.get_upnp_client(player)
     result = await client.send_command(
         upnp.SERVICE_AVTRANSPORT,
         'RemoveAllTracksFromQueue',
-        [
-            ('InstanceID', 0),
-        ],
+        _INSTANCE_ARGS,
     )
     log.debug('clear_queue: result = %r', result)
 
@@ -350,6 +330,29 @@ async def subscribe(
     return sub
 
 
+async def subscribe_batch(
+        player: models.Player,
+        service: upnp.UPnPService,
+        callback: event.BatchEventCB,
+        auto_renew: bool = False,
+        batch_delay: float = 0.0) -> event.Subscription:
+    '''Like subscribe(), but events that arrive together (Sonos players
+    often send several in quick succession) are passed to the callback in
+    a single call as a list: ``callback([event1, event2, ...])``.
+
+    Events only count as arriving together if they arrive in the same
+    iteration of the event loop, unless you pass ``batch_delay``: then
+    everything that arrives within that many seconds of the first event
+    is collected before calling the callback (so every event is delayed
+    by up to ``batch_delay`` seconds).
+    '''
+    sub = event.Subscription(
+        upnp.get_session(), player, service,
+        batch_callback=callback, batch_delay=batch_delay)
+    await sub.subscribe(auto_renew=auto_renew)
+    return sub
+
+
 def get_subscriptions_for_player(player: models.Player) -> List[event.Subscription]:
     '''Return all subscriptions for the specified player.'''
     return event.Subscription.get_subscriptions(player)
@@ -359,11 +362,13 @@ async def close() -> None:
     '''Release any resources held by this library.'''
     await event.Subscription.unsubscribe_all()
     await upnp.close()
+    _group_state_cache.clear()
 
 
 def parse_time(time_str: str) -> int:
     """convert a string of the form h:mm:ss to seconds"""
     if time_str == 'NOT_IMPLEMENTED':
         return -1
-    bits = time_str.split(':')
-    return int(bits[0]) * 3600 + int(bits[1]) * 60 + int(bits[2])
+    (hours, _, rest) = time_str.partition(':')
+    (minutes, _, seconds) = rest.partition(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
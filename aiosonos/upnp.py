@@ -1,7 +1,14 @@
+import asyncio
+import functools
 import logging
-from xml.sax import saxutils
+import re
+import sys
+import weakref
+from types import MappingProxyType
 from xml.etree import ElementTree
-from typing import Optional, NoReturn, Any, Dict, List, Tuple
+from typing import (
+    Optional, NoReturn, Any, ClassVar, Dict, Iterable, List, Mapping, Sequence, Tuple,
+    Union)
 import urllib.parse as urlparse
 
 import aiohttp.client
@@ -11,57 +18,89 @@ from . import utils, errors, models
 log = logging.getLogger(__name__)
 
 # type aliases
-SOAPArgs = Optional[List[Tuple[str, Any]]]
+SOAPArgs = Optional[Sequence[Tuple[str, Any]]]
+
+# Actions that only read state from the player: if one of these is already
+# in flight when an identical request comes along, the second caller just
+# waits for the first response rather than sending another request.
+_READ_ONLY_ACTIONS = frozenset((
+    'Browse',
+    'GetMute',
+    'GetPositionInfo',
+    'GetTransportInfo',
+    'GetVolume',
+    'GetZoneGroupState',
+))
+
+# path to the <{actionName}Response> element in a SOAP response
+_ACTION_RESPONSE_PATH = '{http://schemas.xmlsoap.org/soap/envelope/}Body/*'
+
+# an <{actionName}Response> element with no arguments in it (either
+# self-closing or with nothing between the tags), and no attributes apart
+# from namespace declarations
+_EMPTY_RESPONSE_RE = re.compile(
+    rb'<(\w+):(\w+Response)(?:\s+xmlns:\w+="[^"]*")*\s*(?:/>|>\s*</\1:\2>)')
+
+# the <errorCode> element in a UPnP error, in its usual form
+_ERROR_CODE_RE = re.compile(r'<errorCode>\s*(\d+)\s*</errorCode>')
+
+# ... and in any form
+_ERROR_CODE_PATH = './/{urn:schemas-upnp-org:control-1-0}errorCode'
 
 
 class UPnPService:
-    service_type: str
-    version: int
-    control_url: str
-    scpd_url: str
-    event_subscription_url: str
-
-    def __init__(self) -> None:
-        self.service_type = self.__class__.__name__
-        self.version = 1
-
-        # The UPnP Control URL.
-        self.control_url = "{}/Control".format(self.service_type)
-        # The service control protocol description URL.
-        self.scpd_url = "xml/{}{}.xml".format(self.service_type, self.version)
-        # The service event subscription URL.
-        self.event_subscription_url = "{}/Event".format(self.service_type)
-
-        # From table 3.3 in
-        # http://upnp.org/specs/arch/UPnP-arch-DeviceArchitecture-v1.1.pdf
-        # This list may not be complete, but should be good enough to be going
-        # on with.  Error codes between 700-799 are defined for particular
-        # services, and may be overriden in subclasses. Error codes >800
-        # are generally SONOS specific. NB It may well be that SONOS does not
-        # use some of these error codes.
-
-        # pylint: disable=invalid-name
-        self.upnp_errors = {
-            400: "Bad Request",
-            401: "Invalid Action",
-            402: "Invalid Args",
-            404: "Invalid Var",
-            412: "Precondition Failed",
-            501: "Action Failed",
-            600: "Argument Value Invalid",
-            601: "Argument Value Out of Range",
-            602: "Optional Action Not Implemented",
-            603: "Out Of Memory",
-            604: "Human Intervention Required",
-            605: "String Argument Too Long",
-            606: "Action Not Authorized",
-            607: "Signature Failure",
-            608: "Signature Missing",
-            609: "Not Encrypted",
-            610: "Invalid Sequence",
-            611: "Invalid Control URL",
-            612: "No Such Session",
-        }
+    # All of these are determined by the class, so they are computed once
+    # per subclass (by __init_subclass__()) rather than per instance.
+    # Subclasses may override control_url and event_subscription_url.
+    service_type: ClassVar[str]
+    version: ClassVar[int] = 1
+    control_url: ClassVar[str]              # the UPnP Control URL
+    scpd_url: ClassVar[str]                 # the service description URL
+    event_subscription_url: ClassVar[str]   # the event subscription URL
+
+    # From table 3.3 in
+    # http://upnp.org/specs/arch/UPnP-arch-DeviceArchitecture-v1.1.pdf
+    # This list may not be complete, but should be good enough to be going
+    # on with.  Error codes between 700-799 are defined for particular
+    # services: subclasses list theirs in service_errors, which are merged
+    # with these. Error codes >800 are generally SONOS specific. NB It may
+    # well be that SONOS does not use some of these error codes.
+    upnp_errors: ClassVar[Mapping[int, str]] = MappingProxyType({
+        400: "Bad Request",
+        401: "Invalid Action",
+        402: "Invalid Args",
+        404: "Invalid Var",
+        412: "Precondition Failed",
+        501: "Action Failed",
+        600: "Argument Value Invalid",
+        601: "Argument Value Out of Range",
+        602: "Optional Action Not Implemented",
+        603: "Out Of Memory",
+        604: "Human Intervention Required",
+        605: "String Argument Too Long",
+        606: "Action Not Authorized",
+        607: "Signature Failure",
+        608: "Signature Missing",
+        609: "Not Encrypted",
+        610: "Invalid Sequence",
+        611: "Invalid Control URL",
+        612: "No Such Session",
+    })
+    service_errors: ClassVar[Dict[int, str]] = {}
+
+    # services have no per-instance state at all
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        service_type = cls.service_type = sys.intern(cls.__name__)
+        cls.scpd_url = f'xml/{service_type}{cls.version}.xml'
+        if 'control_url' not in cls.__dict__:
+            cls.control_url = f'{service_type}/Control'
+        if 'event_subscription_url' not in cls.__dict__:
+            cls.event_subscription_url = f'{service_type}/Event'
+        if 'service_errors' in cls.__dict__:
+            cls.upnp_errors = MappingProxyType({**cls.upnp_errors, **cls.service_errors})
 
     def __str__(self):
         return self.service_type
@@ -70,91 +109,84 @@ class UPnPService:
 class ZoneGroupTopology(UPnPService):
     """Sonos zone group topology service, for functions relating to network
     topology, diagnostics and updates."""
-    pass
+    __slots__ = ()
 
 
 class AVTransport(UPnPService):
     '''UPnP standard AV Transport service, for functions relating to transport
     management, eg play, stop, seek, playlists etc.'''
-
-    def __init__(self) -> None:
-        super().__init__()
-        self.control_url = 'MediaRenderer/AVTransport/Control'
-        self.event_subscription_url = 'MediaRenderer/AVTransport/Event'
-
-        # For error codes, see
-        # http://upnp.org/specs/av/UPnP-av-AVTransport-v1-Service.pdf
-        self.upnp_errors.update(
-            {
-                701: 'Transition not available',
-                702: 'No contents',
-                703: 'Read error',
-                704: 'Format not supported for playback',
-                705: 'Transport is locked',
-                706: 'Write error',
-                707: 'Media is protected or not writeable',
-                708: 'Format not supported for recording',
-                709: 'Media is full',
-                710: 'Seek mode not supported',
-                711: 'Illegal seek target',
-                712: 'Play mode not supported',
-                713: 'Record quality not supported',
-                714: 'Illegal MIME-Type',
-                715: 'Content "BUSY"',
-                716: 'Resource Not found',
-                717: 'Play speed not supported',
-                718: 'Invalid InstanceID',
-                737: 'No DNS Server',
-                738: 'Bad Domain Name',
-                739: 'Server Error',
-            }
-        )
+    __slots__ = ()
+
+    control_url = 'MediaRenderer/AVTransport/Control'
+    event_subscription_url = 'MediaRenderer/AVTransport/Event'
+
+    # For error codes, see
+    # http://upnp.org/specs/av/UPnP-av-AVTransport-v1-Service.pdf
+    service_errors = {
+        701: 'Transition not available',
+        702: 'No contents',
+        703: 'Read error',
+        704: 'Format not supported for playback',
+        705: 'Transport is locked',
+        706: 'Write error',
+        707: 'Media is protected or not writeable',
+        708: 'Format not supported for recording',
+        709: 'Media is full',
+        710: 'Seek mode not supported',
+        711: 'Illegal seek target',
+        712: 'Play mode not supported',
+        713: 'Record quality not supported',
+        714: 'Illegal MIME-Type',
+        715: 'Content "BUSY"',
+        716: 'Resource Not found',
+        717: 'Play speed not supported',
+        718: 'Invalid InstanceID',
+        737: 'No DNS Server',
+        738: 'Bad Domain Name',
+        739: 'Server Error',
+    }
 
 
 class ContentDirectory(UPnPService):
     '''UPnP standard Content Directory service, for functions relating to
     browsing, searching and listing available music.'''
-
-    def __init__(self) -> None:
-        super().__init__()
-
-        self.control_url = 'MediaServer/ContentDirectory/Control'
-        self.event_subscription_url = 'MediaServer/ContentDirectory/Event'
-        # For error codes, see table 2.7.16 in
-        # http://upnp.org/specs/av/UPnP-av-ContentDirectory-v1-Service.pdf
-        self.upnp_errors.update(
-            {
-                701: 'No such object',
-                702: 'Invalid CurrentTagValue',
-                703: 'Invalid NewTagValue',
-                704: 'Required tag',
-                705: 'Read only tag',
-                706: 'Parameter Mismatch',
-                708: 'Unsupported or invalid search criteria',
-                709: 'Unsupported or invalid sort criteria',
-                710: 'No such container',
-                711: 'Restricted object',
-                712: 'Bad metadata',
-                713: 'Restricted parent object',
-                714: 'No such source resource',
-                715: 'Resource access denied',
-                716: 'Transfer busy',
-                717: 'No such file transfer',
-                718: 'No such destination resource',
-                719: 'Destination resource access denied',
-                720: 'Cannot process the request',
-            }
-        )
+    __slots__ = ()
+
+    control_url = 'MediaServer/ContentDirectory/Control'
+    event_subscription_url = 'MediaServer/ContentDirectory/Event'
+
+    # For error codes, see table 2.7.16 in
+    # http://upnp.org/specs/av/UPnP-av-ContentDirectory-v1-Service.pdf
+    service_errors = {
+        701: 'No such object',
+        702: 'Invalid CurrentTagValue',
+        703: 'Invalid NewTagValue',
+        704: 'Required tag',
+        705: 'Read only tag',
+        706: 'Parameter Mismatch',
+        708: 'Unsupported or invalid search criteria',
+        709: 'Unsupported or invalid sort criteria',
+        710: 'No such container',
+        711: 'Restricted object',
+        712: 'Bad metadata',
+        713: 'Restricted parent object',
+        714: 'No such source resource',
+        715: 'Resource access denied',
+        716: 'Transfer busy',
+        717: 'No such file transfer',
+        718: 'No such destination resource',
+        719: 'Destination resource access denied',
+        720: 'Cannot process the request',
+    }
 
 
 class Queue(UPnPService):
     '''Sonos queue service, for functions relating to queue management, saving
     queues etc.'''
-    def __init__(self) -> None:
-        super().__init__()
+    __slots__ = ()
 
-        self.control_url = 'MediaRenderer/Queue/Control'
-        self.event_subscription_url = 'MediaRenderer/Queue/Event'
+    control_url = 'MediaRenderer/Queue/Control'
+    event_subscription_url = 'MediaRenderer/Queue/Event'
 
 
 SERVICE_TOPOLOGY = ZoneGroupTopology()
@@ -163,6 +195,46 @@ SERVICE_CONTENT_DIRECTORY = ContentDirectory()
 SERVICE_QUEUE = Queue()
 
 
+# there are only so many distinct actions that we ever send, so the
+# headers for each one only need to be built once
+@functools.lru_cache(maxsize=256)
+def _soap_headers(service_type: str, version: int, action: str) -> Mapping[str, str]:
+    soap_action = (
+        f'"urn:schemas-upnp-org:service:{service_type}:{version}#{action}"'
+    )
+    # read-only, so it can be shared by every request for this action
+    return MappingProxyType({
+        'Content-Type': 'text/xml; charset="utf-8"',
+        'SOAPACTION': soap_action,
+    })
+
+
+@functools.lru_cache(maxsize=256)
+def _soap_envelope(service_type: str, version: int, action: str) -> Tuple[bytes, bytes]:
+    '''Return the SOAP envelope for action, as the bytes that go before and
+    after the arguments.'''
+    envelope = UPnPClient.SOAP_BODY_TEMPLATE.format(
+        arguments='\0',
+        action=action,
+        service_type=service_type,
+        version=version,
+    )
+    (prefix, suffix) = envelope.split('\0')
+    return (prefix.encode(), suffix.encode())
+
+
+# likewise for argument names
+_encode_name = functools.lru_cache(maxsize=256)(str.encode)
+
+# for escaping argument values
+_XML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+})
+
+
 class UPnPClient:
     '''An object for sending UPnP requests to a single player.'''
 
@@ -186,6 +258,13 @@ class UPnPClient:
         self.base_url = base_url
         self.session = session
 
+        # read-only requests currently in flight, so identical concurrent
+        # requests can share one response
+        self._inflight: Dict[Tuple, 'asyncio.Future[Dict[str, Any]]'] = {}
+
+        # map from service to its control URL on this player
+        self._control_urls: Dict[UPnPService, str] = {}
+
     async def send_command(
             self,
             service: UPnPService,
@@ -210,38 +289,79 @@ class UPnPClient:
             `UnknownSoCoException`: if an unknonwn UPnP error occurs.
 
         '''
+        if action not in _READ_ONLY_ACTIONS:
+            return await self._send_command(service, action, args)
+
+        # str() every value: that's what ends up on the wire anyway, and it
+        # means the key is hashable whatever the caller passed
+        key = (
+            service.service_type,
+            action,
+            tuple((name, str(value)) for (name, value) in args or ()),
+        )
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._send_command(service, action, args))
+            self._inflight[key] = future
+
+            def done(future: 'asyncio.Future[Dict[str, Any]]') -> None:
+                self._inflight.pop(key, None)
+                # if every caller was cancelled, nobody else will look at
+                # the exception, and asyncio would complain about that
+                if not future.cancelled():
+                    future.exception()
+
+            future.add_done_callback(done)
+        else:
+            log.debug('Joining in-flight UPnP command %s %r', action, args)
+
+        # shield: one caller being cancelled must not cancel the request
+        # for everyone else waiting on it; and copy the result, so callers
+        # can't trip each other up by modifying it
+        return dict(await asyncio.shield(future))
+
+    async def _send_command(
+            self,
+            service: UPnPService,
+            action: str,
+            args: SOAPArgs) -> Dict[str, Any]:
         headers, body = self.build_command(service, action, args)
-        url = urlparse.urljoin(self.base_url, service.control_url)
+        url = self._control_urls.get(service)
+        if url is None:
+            url = self._control_urls[service] = urlparse.urljoin(
+                self.base_url, service.control_url)
         utils.log_network(
             log,
             'Sending UPnP command %s to %s',
             action,
             url,
-            data=utils.prettify(body))
-        # Convert the body to bytes, and send it.
-        response = await self.session.post(
-            url, headers=headers, data=body.encode())
+            data=body,
+            pretty=True)
+        response = await self.session.post(url, headers=headers, data=body)
         async with response:
-            response_text = await response.text()
+            # raw bytes: the XML parser can decode them itself, so there's
+            # no need for aiohttp to decode the whole body first
+            response_body = await response.read()
 
         status = response.status
         utils.log_network(
             log,
             'Received UPnP response %d',
             status,
-            data=utils.prettify(response_text))
+            data=response_body,
+            pretty=True)
         if status == 200:
             # The response is good. Get the output params, and return them.
             # NB an empty dict is a valid result. It just means that no
-            # params are returned. By using response_text, we rely upon
-            # aiohttp to convert to unicode for us.
-            result = self.unwrap_arguments(response_text)
+            # params are returned.
+            result = self.unwrap_arguments(response_body)
             return result
         elif status == 500:
             # Internal server error. UPnP requires this to be returned if the
             # device does not like the action for some reason. The returned
             # content will be a SOAP Fault. Parse it and raise an error.
-            self.raise_upnp_error(service, url, response_text)
+            self.raise_upnp_error(
+                service, url, response_body.decode('utf-8', errors='replace'))
         else:
             # Something else has gone wrong -- let aiohttp handle it.
             response.raise_for_status()
@@ -251,7 +371,7 @@ class UPnPClient:
             self,
             service: UPnPService,
             action: str,
-            args: SOAPArgs = None) -> Tuple[Dict, str]:
+            args: SOAPArgs = None) -> Tuple[Mapping[str, str], bytes]:
         '''Build a SOAP request.
 
         Args:
@@ -261,10 +381,10 @@ class UPnPClient:
                 value) tuples.
 
         Returns:
-            tuple: a tuple containing the POST headers (as a dict) and a
-                string containing the relevant SOAP body. Does not set
-                content-length, or host headers, which are completed upon
-                sending.
+            tuple: a tuple containing the POST headers (as a read-only
+                mapping, shared between calls) and the relevant SOAP body
+                (as utf-8 bytes). Does not set content-length, or host
+                headers, which are completed upon sending.
         '''
 
         # A complete request should look something like this:
@@ -288,26 +408,12 @@ class UPnPClient:
         #   </s:Body>
         # </s:Envelope>
 
-        arguments = self.wrap_arguments(args)
-        body = self.SOAP_BODY_TEMPLATE.format(
-            arguments=arguments,
-            action=action,
-            service_type=service.service_type,
-            version=service.version,
-        )
-        soap_action_template = (
-            '"urn:schemas-upnp-org:service:{service_type}:{version}#{action}"'
-        )
-        soap_action = soap_action_template.format(
-            service_type=service.service_type, version=service.version, action=action
-        )
-        headers = {
-            'Content-Type': 'text/xml; charset="utf-8"',
-            'SOAPACTION': soap_action,
-        }
-        # Note that although we set the charset to utf-8 here, in fact the
-        # body is still a str. It will only be converted to bytes when it
-        # is set over the network
+        # Everything except the arguments is the same every time we send a
+        # given action, so just stick the arguments between the two
+        # (pre-encoded) halves of the envelope.
+        (prefix, suffix) = _soap_envelope(service.service_type, service.version, action)
+        body = prefix + self.wrap_arguments(args) + suffix
+        headers = _soap_headers(service.service_type, service.version, action)
         return (headers, body)
 
     def raise_upnp_error(
@@ -353,10 +459,16 @@ class UPnPClient:
         # All that matters for our purposes is the errorCode.
         # errorDescription is not required, and Sonos does not seem to use it.
 
-        # NB need to encode unicode strings before passing to ElementTree
-        error = ElementTree.fromstring(xml_error)
         log.debug("Error %s", xml_error)
-        error_code = error.findtext(".//{urn:schemas-upnp-org:control-1-0}errorCode")
+
+        # The errorCode is all we want, so don't parse the whole document
+        # unless it's in some unexpected form (eg. with a namespace prefix).
+        match = _ERROR_CODE_RE.search(xml_error)
+        if match is not None:
+            error_code: Optional[str] = match.group(1)
+        else:
+            error = ElementTree.fromstring(xml_error)
+            error_code = error.findtext(_ERROR_CODE_PATH)
         if error_code is not None:
             description = service.upnp_errors.get(int(error_code), "")
             raise errors.SonosUPnPError(
@@ -371,15 +483,18 @@ class UPnPClient:
         raise errors.SonosError(xml_error)
 
     @staticmethod
-    def wrap_arguments(args: SOAPArgs = None) -> str:
+    def wrap_arguments(args: SOAPArgs = None) -> bytes:
         """Wrap a list of tuples in xml ready to pass into a SOAP request.
 
+        Returns the xml as utf-8 bytes.
+
         Args:
             args (list):  a list of (name, value) tuples specifying the
                 name of each argument and its value, eg
                 ``[('InstanceID', 0), ('Speed', 1)]``. The value
-                can be a string or something with a string representation. The
-                arguments are escaped and wrapped in <name> and <value> tags.
+                can be a string or something with a string representation
+                (except bools, which become 1 or 0). The arguments are
+                escaped and wrapped in <name> and <value> tags.
 
         Example:
 
@@ -387,29 +502,39 @@ class UPnPClient:
             >>> device = SoCo('192.168.1.101')
             >>> s = Service(device)
             >>> print(s.wrap_arguments([('InstanceID', 0), ('Speed', 1)]))
-            <InstanceID>0</InstanceID><Speed>1</Speed>'
+            b'<InstanceID>0</InstanceID><Speed>1</Speed>'
         """
-        if args is None:
-            args = []
+        if not args:
+            return b''
 
-        tags = []
+        parts: List[bytes] = []
+        append = parts.append
         for name, value in args:
-            tag = "<{name}>{value}</{name}>".format(
-                name=name,
-                value=saxutils.escape(str(value), {'"': "&quot;"})
-            )
-            tags.append(tag)
-
-        xml = "".join(tags)
-        return xml
+            name_bytes = _encode_name(name)
+            append(b'<')
+            append(name_bytes)
+            append(b'>')
+            if isinstance(value, bool):
+                # UPnP booleans are "1" and "0", not "True" and "False"
+                append(b'1' if value else b'0')
+            elif isinstance(value, (int, float)):
+                # nothing to escape in a number
+                append(str(value).encode('utf-8'))
+            else:
+                append(str(value).translate(_XML_ESCAPE_TABLE).encode('utf-8'))
+            append(b'</')
+            append(name_bytes)
+            append(b'>')
+
+        return b''.join(parts)
 
     @staticmethod
-    def unwrap_arguments(xml_response: str) -> Dict[str, str]:
+    def unwrap_arguments(xml_response: bytes) -> Dict[str, str]:
         """Extract arguments and their values from a SOAP response.
 
         Args:
-            xml_response (str):  SOAP/xml response text (unicode,
-                not utf-8).
+            xml_response (bytes):  SOAP/xml response body, exactly as
+                received (ie. still encoded).
         Returns:
              dict: a dict of ``{argument_name: value}`` items.
         """
@@ -436,6 +561,11 @@ class UPnPClient:
         #   </s:Body>
         # </s:Envelope>
 
+        # Lots of actions (Play, Pause, ...) have no out args, so don't
+        # bother parsing the response if there is nothing in it.
+        if _EMPTY_RESPONSE_RE.search(xml_response):
+            return {}
+
         # Get all tags in order.
         tree = ElementTree.fromstring(xml_response)
         # try:
@@ -452,10 +582,9 @@ class UPnPClient:
         # <{actionNameResponse}> (depends on what actionName is). Turn the
         # children of this into a {tagname, content} dict. XML unescaping
         # is carried out for us by elementree.
-        element = tree.find("{http://schemas.xmlsoap.org/soap/envelope/}Body")
-        assert element is not None
-        action_response = element[0]
-        return dict((i.tag, i.text or "") for i in action_response)
+        action_response = tree.find(_ACTION_RESPONSE_PATH)
+        assert action_response is not None, 'no <Body> element in SOAP response'
+        return {child.tag: child.text or "" for child in action_response}
 
 
 _session = None
@@ -464,12 +593,55 @@ _session = None
 def get_session() -> aiohttp.client.ClientSession:
     global _session
     if _session is None:
-        _session = aiohttp.ClientSession()
+        # Keep connections to each player open for a while, so that a burst
+        # of commands does not pay for a new TCP connection every time. But
+        # Sonos players are small devices: don't open too many at once.
+        connector = aiohttp.TCPConnector(limit_per_host=4, keepalive_timeout=60)
+        # Sonos players never compress their responses, so don't ask them
+        # to, and don't spend time checking whether they did.
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers={'Accept-Encoding': 'identity'},
+            auto_decompress=False)
     return _session
 
 
+# one UPnPClient per Player, forgotten when the Player goes away
+_clients: 'weakref.WeakKeyDictionary[models.Player, UPnPClient]' = \
+    weakref.WeakKeyDictionary()
+
+
 def get_upnp_client(player: models.Player) -> UPnPClient:
-    return UPnPClient(player.base_url, get_session())
+    '''Return a UPnPClient for player, reusing the same one each time
+    (unless the session it was using has since been closed).'''
+    session = get_session()
+    client = _clients.get(player)
+    if client is None or client.session is not session:
+        client = _clients[player] = UPnPClient(player.base_url, session)
+    return client
+
+
+async def broadcast(
+        clients: Iterable[UPnPClient],
+        service: UPnPService,
+        action: str,
+        args: SOAPArgs = None,
+        concurrency: int = 16) -> List[Union[Dict[str, Any], BaseException]]:
+    '''Send the same command to several players at once.
+
+    At most ``concurrency`` requests are in flight at any time. Returns
+    one entry per client, in the same order as ``clients``: either the
+    result of send_command(), or the exception it raised.
+    '''
+    sem = asyncio.Semaphore(concurrency)
+
+    async def send_one(client: UPnPClient) -> Dict[str, Any]:
+        async with sem:
+            return await client.send_command(service, action, args)
+
+    return await asyncio.gather(
+        *[send_one(client) for client in clients],
+        return_exceptions=True)
 
 
 async def close() -> None:
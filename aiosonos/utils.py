@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import logging
 from typing import Any, Union
 
@@ -9,14 +10,14 @@ except AttributeError:
     get_event_loop = asyncio.get_event_loop
 
 
-def prettify(xml_text: str) -> str:
-    '''Return a pretty-printed version of a unicode XML string.
+def prettify(xml_text: Union[str, bytes]) -> str:
+    '''Return a pretty-printed version of an XML string.
 
     Useful for debugging.
 
     Args:
-        xml_text (str): A text representation of XML (unicode,
-            *not* utf-8).
+        xml_text (str or bytes): A text representation of XML (either
+            unicode, or utf-8 encoded bytes).
 
     Returns:
         str: A pretty-printed version of the input.
@@ -25,6 +26,11 @@ def prettify(xml_text: str) -> str:
     import xml.dom.minidom
     import xml.parsers.expat
 
+    if isinstance(xml_text, bytes):
+        xml_text = xml_text.decode('utf-8', errors='replace')
+    if not xml_text.lstrip().startswith('<'):
+        return xml_text            # can't be XML, so don't bother parsing it
+
     try:
         reparsed = xml.dom.minidom.parseString(xml_text)
     except xml.parsers.expat.ExpatError:
@@ -42,7 +48,8 @@ NAMESPACES = {
 }
 
 
-def ns_tag(ns_id, tag):
+@functools.lru_cache(maxsize=256)
+def ns_tag(ns_id: str, tag: str) -> str:
     '''Return a namespace/tag item.
 
     Args:
@@ -58,13 +65,32 @@ def ns_tag(ns_id, tag):
         >>> xml.ns_tag('dc','author')
         '{http://purl.org/dc/elements/1.1/}author'
     '''
-    return '{{{}}}{}'.format(NAMESPACES[ns_id], tag)
+    return f'{{{NAMESPACES[ns_id]}}}{tag}'
+
+
+#: log_network() only logs the data itself if this level is enabled.
+NETWORK_DATA_LEVEL = logging.DEBUG - 1
 
 
-def log_network(log: logging.Logger, fmt: str, *args: Any, data: Union[None, bytes, str]):
-    if log.isEnabledFor(logging.DEBUG - 1) and data:  # log the data too
-        fmt += ':\n%s'
-        if isinstance(data, bytes):
-            data = data.decode('utf-8')
-        args = args + (data,)
-    log.debug(fmt, *args)
+def log_network(
+        log: logging.Logger,
+        fmt: str,
+        *args: Any,
+        data: Union[None, bytes, str],
+        pretty: bool = False):
+    '''Log a network request or response at DEBUG level.
+
+    If the NETWORK_DATA_LEVEL is also enabled, log the data (eg. the body
+    of the request) too: pretty-printed, if pretty is true (so only pass
+    pretty=True if data is XML).
+    '''
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    if data and log.isEnabledFor(NETWORK_DATA_LEVEL):  # log the data too
+        if pretty:
+            data = prettify(data)
+        elif isinstance(data, bytes):
+            data = data.decode('utf-8', errors='replace')
+        log.debug(fmt + ':\n%s', *args, data)
+    else:
+        log.debug(fmt, *args)
@@ -76,7 +76,6 @@ def main() -> None:
     done_fut = loop.create_future()
     loop.add_signal_handler(
         signal.SIGINT, lambda: asyncio.ensure_future(interrupted(loop, done_fut)))
-    # with Python 3.7, we could use asyncio.run() here
     loop.run_until_complete(fancy_subscribe(done_fut))
 
 
@@ -31,5 +31,4 @@ async def main() -> None:
     await sonos.close()
 
 
-# with Python 3.7, we could use asyncio.run() here
-asyncio.get_event_loop().run_until_complete(main())
+asyncio.run(main())
@@ -9,21 +9,17 @@ import time
 from aiosonos import sonos
 
 
-async def main() -> None:
-    logging.basicConfig(
-        format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
-        level=logging.WARNING,
-        stream=sys.stdout)
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('player')
-    args = parser.parse_args()
+async def main(args: argparse.Namespace) -> None:
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
+            level=logging.WARNING,
+            stream=sys.stdout)
 
     player = sonos.get_player(args.player)
     old_position = ''
     while True:
-        track = await sonos.get_current_track_info(player)
-        transport = await sonos.get_transport_info(player)
+        (track, transport) = await sonos.get_now_playing(player)
         now = time.time()
         print('{now:.3f} '
               '{artist}: {title}  '
@@ -31,7 +27,7 @@ async def main() -> None:
               '{state}'
               .format(now=now,
                       old_position=old_position,
-                      state=transport['state'],
+                      state=transport.state,
                       **track),
               end='\r')
 
@@ -39,5 +35,7 @@ async def main() -> None:
         old_position = track['position']
 
 
-# with Python 3.7, we could use asyncio.run() here
-asyncio.get_event_loop().run_until_complete(main())
+# parse args first, so --help or a usage error doesn't set anything else up
+parser = argparse.ArgumentParser()
+parser.add_argument('player')
+asyncio.run(main(parser.parse_args()))
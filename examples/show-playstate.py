@@ -8,27 +8,29 @@ import sys
 from aiosonos import sonos
 
 
-async def main() -> None:
-    logging.basicConfig(
-        format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
-        level=logging.DEBUG,
-        stream=sys.stdout)
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('player')
-    args = parser.parse_args()
+async def main(args: argparse.Namespace) -> None:
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
+            level=logging.DEBUG,
+            stream=sys.stdout)
 
     try:
         player = sonos.get_player(args.player)
-        track_info = await sonos.get_current_track_info(player)
-        transport_info = await sonos.get_transport_info(player)
-        queue = await sonos.get_queue(player)
-
-        print('track_info:', track_info)
-        print('transport_info:', transport_info)
+        # three independent requests: send them all at once
+        (track_info, transport_info, queue) = await asyncio.gather(
+            sonos.get_current_track_info(player),
+            sonos.get_transport_info(player),
+            sonos.get_queue(player))
+
+        print('track_info:', dict(track_info))
+        print('transport_info:', transport_info.asdict())
         print('queue:', queue)
     finally:
         await sonos.close()
 
 
-asyncio.get_event_loop().run_until_complete(main())
+# parse args first, so --help or a usage error doesn't set anything else up
+parser = argparse.ArgumentParser()
+parser.add_argument('player')
+asyncio.run(main(parser.parse_args()))
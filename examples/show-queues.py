@@ -16,8 +16,12 @@ async def main() -> None:
         player = await sonos.discover_one()
         network = await sonos.get_group_state(player)
 
-        for player in network.get_coordinators():
-            queue = await sonos.get_queue(player)
+        # fetch every group's queue at once, then print them in order
+        coordinators = network.get_coordinators()
+        queues = await asyncio.gather(
+            *[sonos.get_queue(player) for player in coordinators])
+
+        for (player, queue) in zip(coordinators, queues):
             if not queue:
                 print('{}: empty queue'.format(player))
             else:
@@ -26,12 +30,12 @@ async def main() -> None:
                     # print('  {}'.format(track))
                     # print('  attrs: {}'.format(vars(track)))
                     print('  {}: {} - {} ({})'.format(
-                        track.id,
-                        track.creator,
+                        track.queue_pos,
+                        track.artist,
                         track.title,
                         track.album))
     finally:
         await sonos.close()
 
-# with Python 3.7, we could use asyncio.run() here
-asyncio.get_event_loop().run_until_complete(main())
+
+asyncio.run(main())
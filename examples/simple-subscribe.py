@@ -5,27 +5,31 @@ import asyncio
 import logging
 import signal
 import sys
+from typing import List
 
 from aiosonos import sonos, upnp, event
 
 log = logging.getLogger(__name__)
 
 
-async def simple_subscribe(done_fut) -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument('player')
-    args = parser.parse_args()
+async def simple_subscribe(args: argparse.Namespace, done_fut) -> None:
     player = sonos.get_player(args.player)
 
-    def handle(event: event.Event) -> None:
-        log.info('received event: %r with %d properties: %s',
-                 event, len(event.properties), ', '.join(event.properties))
+    # Players often send several events in quick succession (eg. when
+    # changing tracks), so collect everything that arrives within 100 ms
+    # and log each batch once.
+    def handle(events: List[event.Event]) -> None:
+        properties = {name: None for event in events for name in event.properties}
+        log.info('received %d event(s): %s with properties: %s',
+                 len(events),
+                 ', '.join(repr(event) for event in events),
+                 ', '.join(properties))
 
     log.debug('subscribing...')
-    await sonos.subscribe(player, upnp.SERVICE_TOPOLOGY, handle, auto_renew=True)
-    await sonos.subscribe(player, upnp.SERVICE_AVTRANSPORT, handle, auto_renew=True)
-    await sonos.subscribe(player, upnp.SERVICE_QUEUE, handle, auto_renew=True)
-    log.debug('back from sonos.subscribe(): looping until done...')
+    for service in [upnp.SERVICE_TOPOLOGY, upnp.SERVICE_AVTRANSPORT, upnp.SERVICE_QUEUE]:
+        await sonos.subscribe_batch(
+            player, service, handle, auto_renew=True, batch_delay=0.1)
+    log.debug('back from sonos.subscribe_batch(): looping until done...')
 
     await done_fut
 
@@ -42,17 +46,22 @@ async def interrupted(loop, done_fut):
 
 
 def main() -> None:
-    logging.basicConfig(
-        format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
-        level=logging.DEBUG,
-        stream=sys.stdout)
+    # parse args first, so --help or a usage error doesn't set anything else up
+    parser = argparse.ArgumentParser()
+    parser.add_argument('player')
+    args = parser.parse_args()
+
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            format='[%(asctime)s %(levelname)-1.1s %(name)s] %(message)s',
+            level=logging.DEBUG,
+            stream=sys.stdout)
 
     loop = asyncio.get_event_loop()
     done_fut = loop.create_future()
     loop.add_signal_handler(
         signal.SIGINT, lambda: asyncio.ensure_future(interrupted(loop, done_fut)))
-    # with Python 3.7, we could use asyncio.run() here
-    loop.run_until_complete(simple_subscribe(done_fut))
+    loop.run_until_complete(simple_subscribe(args, done_fut))
 
 
 main()
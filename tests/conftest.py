@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture
+def group_state():
+    '''Return a function that makes ZoneGroupState XML for a network with
+    one single-player group, named name.'''
+    def group_state(name):
+        return (
+            '<ZoneGroupState><ZoneGroups>'
+            '<ZoneGroup Coordinator="RINCON_000BBB1400" ID="RINCON_000BBB1400:1">'
+            '<ZoneGroupMember'
+            ' Location="http://192.168.1.120:1400/xml/device_description.xml"'
+            f' UUID="RINCON_000BBB1400" ZoneName="{name}"/>'
+            '</ZoneGroup>'
+            '</ZoneGroups></ZoneGroupState>'
+        )
+
+    return group_state
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from typing import List
+
+import aiohttp
+import multidict
+import pytest
+
+from aiosonos import event, models, upnp
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.reason = 'whatever'
+        self.url = 'http://192.168.1.130:1400/ZoneGroupTopology/Event'
+        self.headers = multidict.CIMultiDictProxy(multidict.CIMultiDict(headers or {}))
+
+    async def text(self):
+        return ''
+
+    def raise_for_status(self):
+        raise aiohttp.ClientResponseError(
+            None, (), status=self.status)     # type: ignore
+
+
+class FakeEventServer:
+    def get_subscribe_headers(self):
+        return {'Callback': '<http://192.168.1.2:1234/>', 'NT': 'upnp:event'}
+
+
+def _make_subscription(monkeypatch, responses):
+    monkeypatch.setattr(event, 'get_event_server', FakeEventServer)
+    sub = event.Subscription(
+        None,                                               # type: ignore
+        models.Player.get_instance('192.168.1.130'),
+        upnp.SERVICE_TOPOLOGY,
+        lambda evt: None)
+    requests = []
+
+    async def request(method, url, headers, timeout=3.0):
+        requests.append((method, dict(headers)))
+        return responses.pop(0)
+
+    monkeypatch.setattr(sub, '_request', request)
+    sub.subscribe_url = 'http://192.168.1.130:1400/ZoneGroupTopology/Event'
+    return (sub, requests)
+
+
+async def test_resubscribe_when_sid_unknown(monkeypatch):
+    (sub, requests) = _make_subscription(monkeypatch, [
+        FakeResponse(200, {'SID': 'uuid:old', 'TIMEOUT': 'Second-3600'}),
+        FakeResponse(412),
+        FakeResponse(200, {'SID': 'uuid:new', 'TIMEOUT': 'Second-3600'}),
+    ])
+
+    try:
+        await sub._subscribe(FakeEventServer())            # type: ignore
+        assert event.Subscription._instances['uuid:old'] is sub
+        await sub._renew_or_resubscribe()
+
+        assert [method for (method, _) in requests] == ['SUBSCRIBE'] * 3
+        assert requests[1][1] == {'SID': 'uuid:old'}
+        assert 'SID' not in requests[2][1]
+        assert sub.sid == 'uuid:new'
+        assert sub.state == 1
+        assert event.Subscription.get_instance('uuid:old') is None
+        assert event.Subscription._instances['uuid:new'] is sub
+    finally:
+        event.Subscription._instances.pop(sub.sid, None)
+
+
+async def test_resubscribe_when_expired(monkeypatch):
+    (sub, requests) = _make_subscription(monkeypatch, [
+        FakeResponse(200, {'SID': 'uuid:old', 'TIMEOUT': 'Second-60'}),
+        FakeResponse(200, {'SID': 'uuid:new', 'TIMEOUT': 'Second-60'}),
+    ])
+
+    try:
+        await sub._subscribe(FakeEventServer())            # type: ignore
+        sub.timestamp = time.time() - 61
+        await sub._renew_or_resubscribe()
+
+        # no point trying to renew: went straight to a new subscription
+        assert len(requests) == 2 and 'SID' not in requests[1][1]
+        assert sub.sid == 'uuid:new'
+    finally:
+        event.Subscription._instances.pop(sub.sid, None)
+
+
+async def test_unsubscribe_failure_keeps_renewing(monkeypatch):
+    (sub, requests) = _make_subscription(monkeypatch, [
+        FakeResponse(200, {'SID': 'uuid:sub', 'TIMEOUT': 'Second-3600'}),
+        FakeResponse(500),
+        FakeResponse(200),
+    ])
+
+    try:
+        await sub._subscribe(FakeEventServer())            # type: ignore
+        task = sub.auto_renew_task = asyncio.ensure_future(asyncio.sleep(3600))
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            await sub.unsubscribe()
+        assert sub.state == 1 and not task.cancelled()
+
+        await sub.unsubscribe()
+        await asyncio.sleep(0)
+        assert sub.state == 2 and task.cancelled()
+    finally:
+        event.Subscription._instances.pop(sub.sid, None)
+
+
+async def test_dispatch_events(monkeypatch, caplog):
+    received = []
+
+    def callback(events):
+        received.append(events)
+        raise ValueError('oops')
+
+    (sub, _) = _make_subscription(monkeypatch, [])
+    sub.callback = None
+    sub.batch_callback = callback
+
+    sub.handle_event('event1')                              # type: ignore
+    sub.handle_event('event2')                              # type: ignore
+    await asyncio.sleep(0)
+
+    # both events arrived in one batch, and the error was logged rather
+    # than escaping into the event loop
+    assert received == [['event1', 'event2']]
+    assert 'error in callback' in caplog.text
+
+
+async def test_dispatch_events_batch_delay(monkeypatch):
+    received: List[List[event.Event]] = []
+    (sub, _) = _make_subscription(monkeypatch, [])
+    sub.callback = None
+    sub.batch_callback = received.append
+    sub.batch_delay = 0.05
+
+    sub.handle_event('event1')                              # type: ignore
+    await asyncio.sleep(0.01)
+    sub.handle_event('event2')                              # type: ignore
+    await asyncio.sleep(0)
+    assert received == []
+    await asyncio.sleep(0.1)
+
+    assert received == [['event1', 'event2']]
@@ -0,0 +1,107 @@
+from aiosonos import models, parsers
+
+
+def test_player_get_url():
+    player = models.Player('10.0.0.5')
+    tests = [
+        ('/xml/device_description.xml', 'http://10.0.0.5:1400/xml/device_description.xml'),
+        ('MediaRenderer/AVTransport/Control',
+         'http://10.0.0.5:1400/MediaRenderer/AVTransport/Control'),
+        ('/getaa?u=x-file-cifs%3a%2f%2fhost%2fa.ogg&v=175',
+         'http://10.0.0.5:1400/getaa?u=x-file-cifs%3a%2f%2fhost%2fa.ogg&v=175'),
+        ('/getaa?s=1&u=x-rincon-mp3radio://stream.example.com/live',
+         'http://10.0.0.5:1400/getaa?s=1&u=x-rincon-mp3radio://stream.example.com/live'),
+        ('https://example.com/art.jpg', 'https://example.com/art.jpg'),
+        ('//cdn.example.com/a.jpg', 'http://cdn.example.com/a.jpg'),
+        ('', 'http://10.0.0.5:1400/'),
+    ]
+    for (path, expect) in tests:
+        assert player.get_url(path) == expect
+
+
+def test_player_str():
+    player = models.Player('10.0.0.5')
+    assert str(player) == '10.0.0.5'
+    player.uuid = 'RINCON_000XXX1400'
+    assert str(player) == '10.0.0.5/RINCON_000XXX1400'
+    player.uuid = 'RINCON_000YYY1400'
+    assert str(player) == '10.0.0.5/RINCON_000YYY1400'
+
+
+def test_track_list():
+    tracks = [models.Track('Artist', 'Album', f'Track {i}', queue_pos=i) for i in range(3)]
+    track_list = models.TrackList(tracks, 3, 10, '42')
+    assert len(track_list) == 3
+    assert track_list
+    assert not models.TrackList([], 0, 0, '42')
+    assert track_list[1] is tracks[1]
+    assert [track.title for track in track_list[-2:]] == ['Track 1', 'Track 2']
+    assert list(track_list) == tracks
+
+
+def test_network_find_coordinator():
+    kitchen = models.Player('10.0.0.21')
+    kitchen.uuid = 'RINCON_000AAA1400'
+    kitchen.name = 'Kitchen'
+    den = models.Player('10.0.0.22')
+    den.uuid = 'RINCON_000BBB1400'
+    den.name = 'Den'
+    office = models.Player('10.0.0.23')
+    office.uuid = 'RINCON_000CCC1400'
+    network = models.Network(
+        [models.Group('RINCON_000AAA1400:1', kitchen, [kitchen]),
+         models.Group('RINCON_000BBB1400:7', den, [den]),
+         models.Group('RINCON_000CCC1400:2', office, [office])],
+        [kitchen, den, office],
+        [kitchen, den, office])
+
+    assert network.find_coordinator('RINCON_000BBB1400:7') is den
+    assert network.find_coordinator('RINCON_000AAA1400') is kitchen
+    assert network.find_coordinator('10.0.0.23') is office
+    assert network.find_coordinator('kitch') is kitchen
+    assert network.find_coordinator('DEN') is den
+    assert network.find_coordinator('bedroom') is None
+
+
+def test_track_info():
+    player = models.Player('10.0.0.5')
+    result = {
+        'Track': '3',
+        'TrackDuration': '0:03:25',
+        'TrackURI': 'x-file-cifs://host/music/03.ogg',
+        'RelTime': '0:01:10',
+        'TrackMetaData': (
+            '<DIDL-Lite xmlns:dc="http://purl.org/dc/elements/1.1/" '
+            'xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/" '
+            'xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/">'
+            '<item id="-1" parentID="-1">'
+            '<dc:title>Release</dc:title>'
+            '<dc:creator>Afro Celt Sound System</dc:creator>'
+            '<upnp:album>Volume 2: Release</upnp:album>'
+            '<upnp:albumArtURI>/getaa?v=175</upnp:albumArtURI>'
+            '</item></DIDL-Lite>'),
+    }
+    track = parsers.track_info(player, result)
+    assert track['position'] == '0:01:10'
+    assert track['playlist_position'] == '3'
+    assert track._metadata_fields is None        # not parsed yet
+    assert repr(track).endswith(': x-file-cifs://host/music/03.ogg @ 0:01:10>')
+    assert track._metadata_fields is None        # still not parsed
+
+    assert dict(track) == {
+        'title': 'Release',
+        'artist': 'Afro Celt Sound System',
+        'album': 'Volume 2: Release',
+        'album_art': 'http://10.0.0.5:1400/getaa?v=175',
+        'position': '0:01:10',
+        'playlist_position': '3',
+        'duration': '0:03:25',
+        'uri': 'x-file-cifs://host/music/03.ogg',
+        'metadata': result['TrackMetaData'],
+    }
+    assert '{title} ({position})'.format(**track) == 'Release (0:01:10)'
+
+    result['TrackMetaData'] = 'NOT_IMPLEMENTED'
+    track = parsers.track_info(player, result)
+    assert track['title'] == ''
+    assert track['album_art'] == 'http://10.0.0.5:1400/'
@@ -1,11 +1,11 @@
+import pytest
 from didl_lite import didl_lite as didl
 
-from aiosonos import parsers
+from aiosonos import models, parsers
 
 
-def test_parse_didl():
-    # This is totally valid and didl_lite does not complain at all.
-    valid_input = '''\
+# This is totally valid and didl_lite does not complain at all.
+VALID_DIDL = '''\
 <?xml version="1.0"?>
 <DIDL-Lite xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/" xmlns:r="urn:schemas-rinconnetworks-com:metadata-1-0/" xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/">
   <item id="-1" parentID="-1" restricted="true">
@@ -23,9 +23,9 @@ def test_parse_didl():
 </DIDL-Lite>
 '''
 
-    # This one is missing 'restricted="true"', which makes didl_lite
-    # complain in strict mode.
-    invalid_input = '''\
+# This one is missing 'restricted="true"', which makes didl_lite
+# complain in strict mode.
+INVALID_DIDL = '''\
 <?xml version="1.0"?>
 <DIDL-Lite xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/" xmlns:r="urn:schemas-rinconnetworks-com:metadata-1-0/" xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/">
   <item id="-1" parentID="-1">
@@ -43,13 +43,138 @@ def test_parse_didl():
 </DIDL-Lite>
 '''
 
-    # Assert that both inputs are handled just fine.
-    tests = [
-        (valid_input, 'Afro Celt Sound System'),
-        (invalid_input, 'Afro Celt Sound System'),
+
+# Assert that both inputs are handled just fine.
+@pytest.mark.parametrize('input, expect_creator', [
+    (VALID_DIDL, 'Afro Celt Sound System'),
+    (INVALID_DIDL, 'Afro Celt Sound System'),
+])
+def test_parse_didl(input, expect_creator):
+    output = parsers.parse_didl(input)
+    assert len(output) == 1
+    assert isinstance(output[0], didl.DidlObject)
+    assert output[0].creator == expect_creator
+
+    # every caller gets its own items, so modifying them is harmless
+    output[0].title = 'Changed'
+    again = parsers.parse_didl(input)
+    assert again[0] is not output[0]
+    assert again[0].title == 'Release'
+
+
+def test_parse_event_body():
+    # A RenderingControl event, abridged from a real Sonos player.
+    body = b'''\
+<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">
+  <e:property>
+    <LastChange>&lt;Event xmlns=&quot;urn:schemas-upnp-org:metadata-1-0/RCS/&quot;&gt;&lt;InstanceID val=&quot;0&quot;&gt;&lt;Volume channel=&quot;Master&quot; val=&quot;36&quot;/&gt;&lt;Volume channel=&quot;LF&quot; val=&quot;100&quot;/&gt;&lt;Mute channel=&quot;Master&quot; val=&quot;0&quot;/&gt;&lt;Bass val=&quot;0&quot;/&gt;&lt;/InstanceID&gt;&lt;/Event&gt;</LastChange>
+  </e:property>
+  <e:property>
+    <SomethingElse>hello</SomethingElse>
+  </e:property>
+</e:propertyset>
+'''
+    result = parsers.parse_event_body(body)
+    assert result == {
+        'Volume': {'Master': '36', 'LF': '100'},
+        'Mute': {'Master': '0'},
+        'Bass': '0',
+        'SomethingElse': 'hello',
+    }
+
+
+def test_parse_group_state():
+    groups_xml = '''\
+<ZoneGroupState>
+  <ZoneGroups>
+    <ZoneGroup Coordinator="RINCON_000ZZZ1400" ID="RINCON_000ZZZ1400:0">
+      <ZoneGroupMember
+          Invisible="1"
+          IsZoneBridge="1"
+          Location="http://192.168.1.100:1400/xml/device_description.xml"
+          UUID="RINCON_000ZZZ1400"
+          ZoneName="BRIDGE"/>
+    </ZoneGroup>
+    <ZoneGroup Coordinator="RINCON_000XXX1400" ID="RINCON_000XXX1400:46">
+      <ZoneGroupMember
+          Location="http://192.168.1.101:1400/xml/device_description.xml"
+          UUID="RINCON_000XXX1400"
+          ZoneName="Living Room">
+        <Satellite
+            Invisible="1"
+            Location="http://192.168.1.103:1400/xml/device_description.xml"
+            UUID="RINCON_000SSS1400"
+            ZoneName="Living Room"/>
+      </ZoneGroupMember>
+      <ZoneGroupMember
+          Location="http://192.168.1.102:1400/xml/device_description.xml"
+          UUID="RINCON_000YYY1400"
+          ZoneName="Kitchen"/>
+    </ZoneGroup>
+    <ZoneGroup Coordinator="RINCON_000OFF1400" ID="RINCON_000OFF1400:3">
+      <ZoneGroupMember
+          Location="http://192.168.1.104:1400/xml/device_description.xml"
+          UUID="RINCON_000QQQ1400"
+          ZoneName="Offline Coordinator"/>
+    </ZoneGroup>
+  </ZoneGroups>
+  <VanishedDevices/>
+</ZoneGroupState>
+'''
+    network = parsers.parse_group_state(groups_xml)
+    assert [group.uuid for group in network.groups] == [
+        'RINCON_000ZZZ1400:0',
+        'RINCON_000XXX1400:46',
+    ]
+    assert [str(player) for player in network.groups[1].members] == [
+        '192.168.1.101/RINCON_000XXX1400',
+        '192.168.1.103/RINCON_000SSS1400',
+        '192.168.1.102/RINCON_000YYY1400',
     ]
-    for (input, expect_creator) in tests:
-        output = parsers.parse_didl(input)
-        assert len(output) == 1
-        assert isinstance(output[0], didl.DidlObject)
-        assert output[0].creator == expect_creator
+    assert [player.ip_address for player in network.visible_players] == [
+        '192.168.1.101', '192.168.1.102', '192.168.1.104',
+    ]
+    assert len(network.all_players) == 5
+
+    bridge = network.groups[0].coordinator
+    assert bridge.is_bridge
+    assert bridge.is_coordinator
+    living_room = network.groups[1].coordinator
+    assert living_room.name == 'Living Room'
+    assert living_room.is_coordinator
+    assert not living_room.is_bridge
+    assert network.get_group(living_room) is network.groups[1]
+    assert network.groups[1].members[2].is_coordinator is False
+
+
+def test_parse_event_body_zone_group_state():
+    body = b'''\
+<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">
+  <e:property>
+    <ZoneGroupState>&lt;ZoneGroupState&gt;&lt;ZoneGroups&gt;&lt;ZoneGroup Coordinator=&quot;RINCON_000AAA1400&quot; ID=&quot;RINCON_000AAA1400:1&quot;&gt;&lt;ZoneGroupMember Location=&quot;http://192.168.1.110:1400/xml/device_description.xml&quot; UUID=&quot;RINCON_000AAA1400&quot; ZoneName=&quot;Den&quot;/&gt;&lt;/ZoneGroup&gt;&lt;/ZoneGroups&gt;&lt;/ZoneGroupState&gt;</ZoneGroupState>
+  </e:property>
+</e:propertyset>
+'''
+    result = parsers.parse_event_body(body)
+    network = result['ZoneGroupState']
+    assert isinstance(network, models.Network)
+    assert [str(group) for group in network.groups] == ['RINCON_000AAA1400:1']
+    assert network.groups[0].coordinator.name == 'Den'
+
+    # the same XML again (eg. from another subscription) is not reparsed
+    result = parsers.parse_event_body(body)
+    assert result['ZoneGroupState'] is network
+
+
+def test_parse_group_state_cached(group_state):
+    old = parsers.parse_group_state_cached(group_state('Office'))
+    assert parsers.parse_group_state_cached(group_state('Office')) is old
+
+    # only the latest state is remembered, so going back to an earlier
+    # one parses it again (and updates the Player again)
+    new = parsers.parse_group_state_cached(group_state('Study'))
+    assert new is not old
+    assert new.groups[0].coordinator.name == 'Study'
+    again = parsers.parse_group_state_cached(group_state('Office'))
+    assert again is not old
+    assert again.groups[0].coordinator.name == 'Office'
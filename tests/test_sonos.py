@@ -0,0 +1,25 @@
+from aiosonos import parsers, sonos, upnp
+
+
+async def test_get_group_state(monkeypatch, group_state):
+    requests = []
+
+    class FakeClient:
+        async def send_command(self, service, action, args=None):
+            requests.append(action)
+            return {'ZoneGroupState': group_state('Kitchen')}
+
+    monkeypatch.setattr(upnp, 'get_upnp_client', lambda player: FakeClient())
+    monkeypatch.setattr(sonos, '_group_state_cache', {})
+    player = sonos.get_player('192.168.1.120')
+
+    network = await sonos.get_group_state(player)
+    assert await sonos.get_group_state(player) is network
+    assert requests == ['GetZoneGroupState']
+
+    # a topology event with a different state means the cached one is
+    # out of date, even though the TTL hasn't expired
+    parsers.parse_group_state_cached(group_state('Kitchen Nook'))
+    network = await sonos.get_group_state(player)
+    assert network.groups[0].coordinator.name == 'Kitchen'
+    assert requests == ['GetZoneGroupState'] * 2
@@ -0,0 +1,137 @@
+import asyncio
+import gc
+
+import pytest
+
+from aiosonos import errors, models, upnp
+
+
+def _response(body):
+    return (
+        '<?xml version="1.0"?>'
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"'
+        ' s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">'
+        '<s:Body>' + body + '</s:Body></s:Envelope>'
+    ).encode('utf-8')
+
+
+def test_unwrap_arguments():
+    unwrap = upnp.UPnPClient.unwrap_arguments
+    ns = 'xmlns:u="urn:schemas-upnp-org:service:AVTransport:1"'
+
+    # empty responses, which don't need to be parsed
+    assert unwrap(_response(f'<u:PlayResponse {ns}></u:PlayResponse>')) == {}
+    assert unwrap(_response(f'<u:PlayResponse {ns}/>')) == {}
+
+    result = unwrap(_response(
+        f'<u:GetTransportInfoResponse {ns}>'
+        '<CurrentTransportState>PLAYING</CurrentTransportState>'
+        '<CurrentTransportStatus>OK</CurrentTransportStatus>'
+        '<CurrentSpeed>1</CurrentSpeed>'
+        '</u:GetTransportInfoResponse>'))
+    assert result == {
+        'CurrentTransportState': 'PLAYING',
+        'CurrentTransportStatus': 'OK',
+        'CurrentSpeed': '1',
+    }
+
+    # an argument whose value is an escaped empty response must not fool
+    # the empty-response check
+    result = unwrap(_response(
+        f'<u:BrowseResponse {ns}>'
+        f'<Result>&lt;u:XResponse {ns}/&gt;</Result>'
+        '</u:BrowseResponse>'))
+    assert result == {'Result': f'<u:XResponse {ns}/>'}
+
+
+def test_wrap_arguments():
+    wrap = upnp.UPnPClient.wrap_arguments
+    assert wrap() == b''
+    assert wrap([('InstanceID', 0), ('Speed', 1)]) == \
+        b'<InstanceID>0</InstanceID><Speed>1</Speed>'
+    assert wrap([('URI', 'a&b<c>"d"\'e\'')]) == \
+        b'<URI>a&amp;b&lt;c&gt;&quot;d&quot;\'e\'</URI>'
+    assert wrap([('Title', 'caf\xe9')]) == b'<Title>caf\xc3\xa9</Title>'
+    assert wrap([('A', True), ('B', False)]) == b'<A>1</A><B>0</B>'
+
+
+async def test_broadcast():
+    class FakeClient(upnp.UPnPClient):
+        def __init__(self, name):
+            self.name = name
+
+        async def send_command(self, service, action, args=None):
+            if self.name == 'bad':
+                raise errors.SonosError('no good')
+            return {'name': self.name, 'action': action}
+
+    clients = [FakeClient('a'), FakeClient('bad'), FakeClient('b')]
+    results = await upnp.broadcast(
+        clients, upnp.SERVICE_AVTRANSPORT, 'Pause', concurrency=2)
+    assert results[0] == {'name': 'a', 'action': 'Pause'}
+    assert isinstance(results[1], errors.SonosError)
+    assert results[2] == {'name': 'b', 'action': 'Pause'}
+
+
+def test_raise_upnp_error():
+    client = upnp.UPnPClient('http://127.0.0.1:1400/', None)    # type: ignore
+    detail = [
+        # the usual form
+        '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">'
+        '<errorCode>701</errorCode>'
+        '</UPnPError>',
+        # not what Sonos sends, but equivalent
+        '<e:UPnPError xmlns:e="urn:schemas-upnp-org:control-1-0">'
+        '<e:errorCode>701</e:errorCode>'
+        '</e:UPnPError>',
+    ]
+    for upnp_error in detail:
+        xml_error = _response(
+            '<s:Fault>'
+            '<faultcode>s:Client</faultcode>'
+            '<faultstring>UPnPError</faultstring>'
+            '<detail>' + upnp_error + '</detail>'
+            '</s:Fault>').decode('utf-8')
+        with pytest.raises(errors.SonosUPnPError) as excinfo:
+            client.raise_upnp_error(upnp.SERVICE_AVTRANSPORT, 'url', xml_error)
+        assert excinfo.value.error_code == '701'
+        assert excinfo.value.error_description == 'Transition not available'
+
+
+async def test_send_command_coalescing():
+    client = upnp.UPnPClient('http://127.0.0.1:1400/', None)    # type: ignore
+    sent = []
+
+    async def send_command(service, action, args):
+        sent.append(action)
+        await asyncio.sleep(0.01)
+        return {'action': action}
+
+    client._send_command = send_command                         # type: ignore
+
+    # ['a'] isn't hashable, but mustn't stop the request being shared
+    args = [('InstanceID', 0), ('Odd', ['a'])]
+    results = await asyncio.gather(
+        client.send_command(upnp.SERVICE_AVTRANSPORT, 'GetVolume', args),
+        client.send_command(upnp.SERVICE_AVTRANSPORT, 'GetVolume', args),
+        client.send_command(upnp.SERVICE_AVTRANSPORT, 'Play', args),
+        client.send_command(upnp.SERVICE_AVTRANSPORT, 'Play', args))
+    assert sorted(sent) == ['GetVolume', 'Play', 'Play']
+    assert results[0] == results[1] == {'action': 'GetVolume'}
+    assert results[0] is not results[1]
+    assert not client._inflight
+
+
+async def test_get_upnp_client():
+    player = models.Player('10.0.0.5')
+    try:
+        client = upnp.get_upnp_client(player)
+        assert client.base_url == 'http://10.0.0.5:1400/'
+        assert upnp.get_upnp_client(player) is client
+
+        # forgotten along with the player
+        del player
+        gc.collect()
+        assert client not in upnp._clients.values()
+    finally:
+        await upnp.close()
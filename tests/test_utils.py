@@ -1,3 +1,5 @@
+import logging
+
 from aiosonos import utils
 
 
@@ -11,5 +13,34 @@ def test_prettify():
 '''
     assert utils.prettify(input) == expect
 
+    assert utils.prettify(input.encode('utf-8')) == expect
+
     input = 'this is not XML'
     assert utils.prettify(input) == input
+    assert utils.prettify(input.encode('utf-8')) == input
+
+    input = '<foo>not closed'
+    assert utils.prettify(input) == input
+
+
+def test_log_network(caplog):
+    log = logging.getLogger('aiosonos.test')
+    data = b'<foo><bar>hello</bar></foo>'
+
+    with caplog.at_level(logging.DEBUG, logger=log.name):
+        utils.log_network(log, 'sent %s', 'x', data=data, pretty=True)
+    assert caplog.messages == ['sent x']
+
+    caplog.clear()
+    with caplog.at_level(utils.NETWORK_DATA_LEVEL, logger=log.name):
+        utils.log_network(log, 'sent %s', 'x', data=data, pretty=True)
+        utils.log_network(log, 'sent %s', 'y', data=data)
+    assert caplog.messages == [
+        'sent x:\n' + utils.prettify(data),
+        'sent y:\n<foo><bar>hello</bar></foo>',
+    ]
+
+
+def test_ns_tag():
+    assert utils.ns_tag('dc', 'title') == '{http://purl.org/dc/elements/1.1/}title'
+    assert utils.ns_tag('', 'item') == '{urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/}item'